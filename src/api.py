@@ -0,0 +1,258 @@
+"""API HTTP somente leitura sobre os cubos de projeção (ASGI, Starlette + uvicorn).
+
+Serve as mesmas bases de projeção do app, por ICAO, cenário e intervalo de anos, sem
+passar pelo Streamlit. Todas as requisições consultam o mesmo cubo em memória por base
+(utils/query.py, mapeado do artefato gerado por build_cache.py). As respostas saem
+em JSON (gzip quando o cliente aceita) ou em Arrow IPC (stream) e levam ETag: uma
+revalidação com If-None-Match devolve 304 sem refazer nada. A ETag é fraca (W/): a
+mesma vale para a resposta com e sem gzip, e Vary: Accept-Encoding vai nas duas.
+
+Rotas:
+    GET /bases                         bases disponíveis, cenários e anos
+    GET /bases/{nome}/projecoes        linhas por aeroporto (icao, cenario, ano, valor)
+    GET /bases/{nome}/total            linhas do Total Brasil (cenario, ano, valor)
+    GET /bases/{nome}/resumo           resumo por cenário (Total Brasil ou ?icao=)
+    GET /exportacao                    .zip com todas as linhas (?base=...&formato=parquet|csv|xlsx)
+
+Filtros: icao e cenario (repetidos ou separados por vírgula), ano_inicio, ano_fim.
+Formato: ?formato=arrow|json ou cabeçalho Accept: application/vnd.apache.arrow.stream.
+
+Uso (a partir da raiz do repositório):
+    python src/api.py [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+
+from utils import query
+from utils.cube_cache import cube_key
+from utils.data_loader import DATASETS
+from utils.export import FORMATOS, arquivo_exportacao
+
+# Bases de projeção (o cadastro de aeroportos não tem métrica)
+BASES = [nome for nome, spec in DATASETS.items() if spec['metrica']]
+
+TIPO_ARROW = 'application/vnd.apache.arrow.stream'
+TIPO_JSON = 'application/json'
+RESPOSTAS_CACHE_MAX = 256
+# Abaixo disto o gzip não compensa
+GZIP_MINIMO_BYTES = 1024
+
+
+# --- Versão dos Dados ---
+@lru_cache(maxsize=None)
+def versao(nome):
+    """Versão do cubo servido (chave do artefato), fixada na primeira consulta junto com
+    o cubo em memória: base da ETag."""
+    return cube_key(nome)
+
+
+def aquecer():
+    """Mapeia os cubos de todas as bases antes da primeira requisição."""
+    for nome in BASES:
+        query.cubo(nome)
+        versao(nome)
+
+
+# --- Parâmetros ---
+def _lista(params, chave, maiusculas=False):
+    valores = [v.strip() for item in params.getlist(chave) for v in item.split(',') if v.strip()]
+    if maiusculas:
+        valores = [v.upper() for v in valores]
+    return tuple(sorted(set(valores))) or None
+
+
+def _ano(params, chave):
+    valor = params.get(chave)
+    if valor in (None, ''):
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"'{chave}' deve ser um ano inteiro")
+
+
+def _formato(request):
+    formato = request.query_params.get('formato')
+    if formato is None:
+        return 'arrow' if TIPO_ARROW in request.headers.get('accept', '') else 'json'
+    if formato not in ('json', 'arrow'):
+        raise ValueError("'formato' deve ser 'json' ou 'arrow'")
+    return formato
+
+
+# --- Codificação ---
+def _json_valor(v):
+    # NaN/inf (ex.: CAGR sem base ou a partir de zero) não existem em JSON
+    if isinstance(v, float) and not math.isfinite(v):
+        return None
+    return v
+
+
+def _colunas_json(colunas):
+    return {
+        chave: [_json_valor(v) for v in np.asarray(valores, dtype=object).tolist()]
+        for chave, valores in colunas.items()
+    }
+
+
+def _arrow(colunas, metrica):
+    tabela = pa.table({
+        chave: pa.array(valores) if chave != 'ano' else pa.array(valores, type=pa.int16())
+        for chave, valores in colunas.items()
+    }).replace_schema_metadata({'metrica': metrica})
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue().to_pybytes()
+
+
+@lru_cache(maxsize=RESPOSTAS_CACHE_MAX)
+def corpo(rota, nome, icaos, cenarios, ano_inicio, ano_fim, formato):
+    """Resposta codificada de uma consulta: (bytes, bytes em gzip ou None, tipo)."""
+    metrica = DATASETS[nome]['metrica']
+    if rota == 'resumo':
+        dados = {cenario: {k: _json_valor(v) for k, v in linha.items()}
+                 for cenario, linha in query.resumo(nome, icaos[0] if icaos else None).items()}
+        conteudo = {'base': nome, 'metrica': metrica, 'icao': icaos[0] if icaos else None, 'resumo': dados}
+    else:
+        if rota == 'total':
+            colunas = query.total(nome, cenarios, ano_inicio, ano_fim)
+        else:
+            colunas = query.linhas(nome, icaos, cenarios, ano_inicio, ano_fim)
+        if formato == 'arrow':
+            return _arrow(colunas, metrica), None, TIPO_ARROW
+        conteudo = {'base': nome, 'metrica': metrica, 'linhas': len(colunas['ano']), **_colunas_json(colunas)}
+
+    dados = json.dumps(conteudo, ensure_ascii=False, separators=(',', ':')).encode()
+    comprimido = gzip.compress(dados, compresslevel=6) if len(dados) >= GZIP_MINIMO_BYTES else None
+    return dados, comprimido, TIPO_JSON
+
+
+# --- Rotas ---
+def _etag(*partes):
+    # Fraca: a mesma ETag vale para as versões gzip e sem compressão da resposta
+    # (equivalentes, mas não idênticas byte a byte)
+    return 'W/"' + hashlib.sha256(repr(partes).encode()).hexdigest()[:32] + '"'
+
+
+def _etag_confere(etag, if_none_match):
+    """If-None-Match (lista separada por vírgulas ou *) com comparação fraca: o
+    prefixo W/ é ignorado dos dois lados."""
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in tags}
+
+
+async def consulta(request, rota):
+    nome = request.path_params['nome']
+    if nome not in BASES:
+        return JSONResponse({'erro': f"base '{nome}' não encontrada"}, status_code=404)
+    try:
+        params = request.query_params
+        icaos = _lista(params, 'icao', maiusculas=True)
+        cenarios = _lista(params, 'cenario')
+        ano_inicio, ano_fim = _ano(params, 'ano_inicio'), _ano(params, 'ano_fim')
+        formato = 'json' if rota == 'resumo' else _formato(request)
+        if rota == 'resumo' and icaos and len(icaos) > 1:
+            raise ValueError("o resumo aceita um único 'icao'")
+    except ValueError as e:
+        return JSONResponse({'erro': str(e)}, status_code=400)
+
+    chave = (rota, nome, icaos, cenarios, ano_inicio, ano_fim, formato)
+    etag = _etag(await run_in_threadpool(versao, nome), *chave)
+    cabecalhos = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept, Accept-Encoding'}
+    if _etag_confere(etag, request.headers.get('if-none-match', '')):
+        return Response(status_code=304, headers=cabecalhos)
+
+    # Consulta e codificação fora do event loop (CPU); o resultado fica no LRU
+    dados, comprimido, tipo = await run_in_threadpool(corpo, *chave)
+    if comprimido is not None and 'gzip' in request.headers.get('accept-encoding', ''):
+        dados = comprimido
+        cabecalhos['Content-Encoding'] = 'gzip'
+    return Response(dados, media_type=tipo, headers=cabecalhos)
+
+
+async def bases(request):
+    def listar():
+        resultado = {}
+        for nome in BASES:
+            cube = query.cubo(nome)
+            anos = [int(a) for por_cenario in cube['anos'].values() for a in (por_cenario.min(), por_cenario.max())]
+            resultado[nome] = {
+                'titulo': DATASETS[nome]['titulo'],
+                'metrica': DATASETS[nome]['metrica'],
+                'cenarios': [str(c) for c in cube['anos']],
+                'anos': [min(anos), max(anos)] if anos else None,
+                'aeroportos': len(cube['indice']['posicoes']),
+            }
+        return resultado
+    return JSONResponse(await run_in_threadpool(listar))
+
+
+async def exportacao(request):
+    pedidas = _lista(request.query_params, 'base')
+    formato = request.query_params.get('formato', 'parquet')
+    desconhecidas = sorted(set(pedidas or ()) - set(BASES))
+    if desconhecidas:
+        return JSONResponse({'erro': f"base(s) não encontrada(s): {', '.join(desconhecidas)}"}, status_code=404)
+    if formato not in FORMATOS:
+        return JSONResponse({'erro': f"'formato' deve ser um de: {', '.join(FORMATOS)}"}, status_code=400)
+    # Gerado uma vez por versão dos cubos e enviado do disco em blocos
+    bases_exportadas = [nome for nome in BASES if pedidas is None or nome in pedidas]
+    caminho = await run_in_threadpool(arquivo_exportacao, bases_exportadas, formato)
+    return FileResponse(caminho, media_type='application/zip', filename=os.path.basename(caminho))
+
+
+async def projecoes(request):
+    return await consulta(request, 'projecoes')
+
+
+async def total(request):
+    return await consulta(request, 'total')
+
+
+async def resumo(request):
+    return await consulta(request, 'resumo')
+
+
+@contextlib.asynccontextmanager
+async def ciclo_de_vida(app):
+    await run_in_threadpool(aquecer)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route('/bases', bases),
+        Route('/bases/{nome}/projecoes', projecoes),
+        Route('/bases/{nome}/total', total),
+        Route('/bases/{nome}/resumo', resumo),
+        Route('/exportacao', exportacao),
+    ],
+    lifespan=ciclo_de_vida,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,31 @@
+import time
+# Início da execução do script (na primeira execução do processo inclui as importações)
+INICIO_SCRIPT = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import os
-import numpy as np 
-import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
+from components.data import load_base, load_cube, registrar_inicializacao, relatorio_carga
+from utils.aggregates import ANO_ALVO, ANO_BASE, buscar_aeroportos, tem_dados, tem_icao
+from utils.data_loader import DATASETS
+from utils.export import FORMATOS, arquivo_exportacao
+from utils.formatters import fmt, fmt_cagr
+from utils.metrics import (cache_instrumentado, configurar_logs, finalizar_execucao, iniciar_execucao,
+                           iniciar_servidor, registrar_falta, registrar_tamanho, secao)
+from utils.query import escolher_base, resumo, serie, snapshot
+
+# --- Instrumentação da Execução ---
+# Duração de cada seção, acertos/faltas dos caches e tamanho do gráfico e do mapa
+# enviados ao navegador, por execução (ver utils/metrics.py). Cada execução gera uma
+# linha de log (JSON, em stderr; nível em LOG_NIVEL); com METRICAS_PORTA os totais
+# do processo ficam em http://<METRICAS_HOST, padrão 127.0.0.1>:<porta>/metrics
+# (formato Prometheus); com ?debug=1 na URL (ou DEBUG_PAINEL=1) a sidebar mostra o
+# painel de depuração.
+configurar_logs('utils.metrics')
+iniciar_execucao(INICIO_SCRIPT)
+if os.environ.get('METRICAS_PORTA'):
+    iniciar_servidor(int(os.environ['METRICAS_PORTA']), os.environ.get('METRICAS_HOST', '127.0.0.1'))
 
 # Configuração da página - ESSENCIAL PARA RESPONSIVIDADE
 st.set_page_config(
@@ -80,202 +100,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- Caminhos dos Dados ---
-CSV_AISWEB = os.path.join('src', 'data', 'AISWEB_Aeroportos.csv')
-CSV_PAX_MERCADO = os.path.join('src', 'data', 'projecoes_por_aeroporto.csv')
-CSV_PAX_PAN = os.path.join('src', 'data', 'base_final_PAN_cenarios.csv')
-CSV_CARGA = os.path.join('src', 'data', 'Painel_Carga.csv')
-# Caminho corrigido para o CSV de passageiros internacionais
-CSV_PAX_INTERNACIONAL = os.path.join('src', 'data', 'Passageiros_Internacionais.csv')
-# Caminho para carga internacional
-CSV_CARGA_INTERNACIONAL = os.path.join('src', 'data', 'Carga_internacional.csv')
-# Caminho para movimentação de aeronaves PAN domésticas
-CSV_MOV_AERONAVES = os.path.join('src', 'data', 'Mov_Aeronaves_dom_PAN.csv')
-
-# --- Função Auxiliar de Limpeza Vetorial (Para todas as funções de Load) ---
-def clean_numeric_series(series):
-    """Limpa e converte uma Series Pandas de string com formato BR para float."""
-    cleaned = (
-        series
-        .astype(str)
-        .str.replace('.', '', regex=False)  # Remove ponto de milhar
-        .str.replace(',', '.', regex=False)  # Troca vírgula por ponto decimal
-    )
-    return pd.to_numeric(cleaned, errors='coerce').fillna(0)
-
-
-# --- Funções de Carregamento ---
-@st.cache_data
-def load_aisweb():
-    try:
-        return pd.read_csv(CSV_AISWEB, encoding='latin-1', sep=';')
-    except Exception:
-        return pd.DataFrame()
-
-@st.cache_data
-def load_pax_mercado():
-    try:
-        df = pd.read_csv(CSV_PAX_MERCADO, sep=';', encoding='latin-1')
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        # Aplica a limpeza robusta para a coluna de valor (total_movimento)
-        df['total_movimento'] = clean_numeric_series(df['total_movimento'])
-        return df
-    except Exception:
-        return pd.DataFrame()
-
-@st.cache_data
-def load_pax_internacional():
-    try:
-        # First, try semicolon as separator (user suspect it's ';')
-        try:
-            df = pd.read_csv(CSV_PAX_INTERNACIONAL, sep=';', encoding='latin-1')
-            # quick check: if df parsed into a single column, treat as failure
-            if df.shape[1] == 1 and df.columns[0].lower().strip() not in ('icao', 'icao\t'):
-                raise ValueError('Parsed as single column with ;, fall back')
-        except Exception:
-            # Try to infer delimiter (TSV or CSV). Use python engine for robustness.
-            try:
-                df = pd.read_csv(CSV_PAX_INTERNACIONAL, sep=None, engine='python', encoding='latin-1')
-            except Exception:
-                # fallback to tab or semicolon if inference fails
-                try:
-                    df = pd.read_csv(CSV_PAX_INTERNACIONAL, sep='\t', encoding='latin-1')
-                except Exception:
-                    df = pd.read_csv(CSV_PAX_INTERNACIONAL, sep=';', encoding='latin-1')
-
-        # Ensure expected columns: keep first 6 if extra columns exist
-        if df.shape[1] >= 6:
-            df = df.iloc[:, :6]
-            df.columns = ['icao', 'ano', 'cenario', 'sentido', 'natureza', 'passageiros']
-        else:
-            # try to map known header names to expected columns
-            cols_l = [c.strip().lower() for c in df.columns]
-            mapping = {}
-            if 'icao' in cols_l:
-                mapping[df.columns[cols_l.index('icao')]] = 'icao'
-            if 'ano' in cols_l:
-                mapping[df.columns[cols_l.index('ano')]] = 'ano'
-            if 'cenario' in cols_l or 'cenário' in cols_l:
-                # handle possible accent
-                idx = cols_l.index('cenario') if 'cenario' in cols_l else cols_l.index('cenário')
-                mapping[df.columns[idx]] = 'cenario'
-            if 'sentido' in cols_l:
-                mapping[df.columns[cols_l.index('sentido')]] = 'sentido'
-            if 'natureza' in cols_l:
-                mapping[df.columns[cols_l.index('natureza')]] = 'natureza'
-            if 'passageiros' in cols_l:
-                mapping[df.columns[cols_l.index('passageiros')]] = 'passageiros'
-            if mapping:
-                df = df.rename(columns=mapping)
-
-        # Normalize key columns if present
-        if 'icao' in df.columns:
-            df['icao'] = df['icao'].astype(str).str.upper().str.strip()
-        if 'cenario' in df.columns:
-            df['cenario'] = df['cenario'].astype(str).str.strip()
-        if 'ano' in df.columns:
-            df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-
-        # Ensure passageiros is numeric
-        if 'passageiros' in df.columns:
-            df['passageiros'] = clean_numeric_series(df['passageiros'])
-        else:
-            df['passageiros'] = 0
-
-        # Aggregate by ICAO, ano, cenario
-        if set(['icao', 'ano', 'cenario']).issubset(df.columns):
-            df = (
-                df.dropna(subset=['icao', 'ano', 'cenario'])
-                  .groupby(['icao', 'ano', 'cenario'], as_index=False)['passageiros']
-                  .sum()
-                  .sort_values(['icao', 'cenario', 'ano'])
-            )
-
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar Passageiros_Internacionais.csv: {e}")
-        return pd.DataFrame()
-
-@st.cache_data
-def load_carga():
-    try:
-        df = pd.read_csv(CSV_CARGA, sep=';', encoding='latin-1')
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        
-        # Limpeza robusta para 'carga_(kg)'
-        df['carga_(kg)'] = clean_numeric_series(df['carga_(kg)'])
-        
-        df = df.dropna(subset=['icao', 'cenario', 'ano', 'carga_(kg)'])
-        return df
-    except Exception:
-        return pd.DataFrame()
-        
-@st.cache_data
-def load_pax_pan_domestico():
-    try:
-        df = pd.read_csv(CSV_PAX_PAN, sep=';', encoding='latin-1')
-        df.columns = ['cenario', 'natureza', 'icao', 'sentido', 'ano', 'passageiros']
-        
-        # Limpeza robusta para 'passageiros' do PAN
-        df['passageiros'] = clean_numeric_series(df['passageiros'])
-        # Normaliza a coluna 'natureza' para comparação (remove espaços, lower)
-        df['natureza'] = df['natureza'].astype(str).str.strip().str.lower()
-
-        # Normaliza ICAO e ano
-        df['icao'] = df['icao'].astype(str).str.upper().str.strip()
-        df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-
-        # Filtra por doméstico (CSV tem 'domestico' sem acento/minúsculo)
-        return df[df['natureza'] == 'domestico'].copy()
-    except Exception:
-        return pd.DataFrame()
-
-@st.cache_data
-def load_mov_aeronaves_pan_domestico():
-    """Carrega dados de movimentação de aeronaves domésticas do PAN"""
-    try:
-        df = pd.read_csv(CSV_MOV_AERONAVES, sep=';', encoding='latin-1')
-        # Columns: Cenário Projeção;Natureza;ICAO;Atributo;Valor
-        df.columns = ['cenario', 'natureza', 'icao', 'ano', 'movimentacao']
-        
-        # Limpeza robusta para 'movimentacao'
-        df['movimentacao'] = clean_numeric_series(df['movimentacao'])
-        
-        # Normaliza a coluna 'natureza' para comparação (remove espaços, lower)
-        df['natureza'] = df['natureza'].astype(str).str.strip().str.lower()
-        
-        # Normaliza ICAO e ano
-        df['icao'] = df['icao'].astype(str).str.upper().str.strip()
-        df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-        
-        # Filtra por doméstico
-        return df[df['natureza'] == 'domestico'].copy()
-    except Exception:
-        return pd.DataFrame()
-
-@st.cache_data
-def load_carga_internacional():
-    """Carrega dados de carga internacional"""
-    try:
-        df = pd.read_csv(CSV_CARGA_INTERNACIONAL, sep=';', encoding='latin-1')
-        # Columns: ICAO;Sentido;Cenário;Ano;Carga (kg)
-        df.columns = ['icao', 'sentido', 'cenario', 'ano', 'carga_(kg)']
-        
-        # Limpeza robusta para 'carga_(kg)'
-        df['carga_(kg)'] = clean_numeric_series(df['carga_(kg)'])
-        
-        # Normaliza ICAO, cenario e ano
-        df['icao'] = df['icao'].astype(str).str.upper().str.strip()
-        df['cenario'] = df['cenario'].astype(str).str.strip()
-        df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-        
-        # Agrupa por ICAO, Cenário e Ano (soma Exportação + Importação)
-        df_agrupado = df.groupby(['icao', 'cenario', 'ano'])['carga_(kg)'].sum().reset_index()
-        
-        return df_agrupado
-    except Exception:
-        return pd.DataFrame()
-
 # --- Funções de Conversão (NÃO USADAS NA BASE, MANTIDAS POR SEGURANÇA) ---
 # Essas funções não são mais chamadas na sidebar, pois a limpeza já é feita nos loaders
 def convert_passageiros_value(value):
@@ -303,32 +127,67 @@ def convert_carga_value(value):
     except:
         return 0.0
 
-# --- FUNÇÃO DE FORMATAÇÃO PRINCIPAL (PADRÃO BR) ---
-def fmt(v, is_carga):
-    if v is None or np.isnan(v): return "N/A"
-    v = abs(v) 
-    
-    if is_carga:
-        if v >= 1e9: text = f"{v/1e9:,.1f}" + "B kg"
-        elif v >= 1e6: text = f"{v/1e6:,.1f}" + "M kg"
-        else: text = f"{v:,.0f}" + " kg"
-    else:
-        if v >= 1e9: text = f"{v/1e9:,.1f}" + "B"
-        elif v >= 1e6: text = f"{v/1e6:,.1f}" + "M"
-        else: text = f"{v:,.0f}"
-            
-    # Converte para padrão brasileiro (PONTO para milhar, VÍRGULA para decimal)
-    text = text.replace(',', 'X').replace('.', ',').replace('X', '.')
-    
-    return text
+# --- Mapa (HTML renderizado em cache) ---
+# O HTML final do folium é guardado em um LRU limitado, indexado só pelo que muda o
+# mapa: base, cenário, ano e ICAO destacado. Trocar apenas a seleção do gráfico, ou
+# voltar a uma combinação já vista, não refaz nem reserializa o mapa.
+MAPA_CACHE_MAX = 64
+MAPA_ALTURA = 600
+
+@cache_instrumentado('render_mapa')
+@st.cache_resource(max_entries=MAPA_CACHE_MAX, show_spinner=False)
+def render_mapa(dataset, cenario, ano, target_icao):
+    """Retorna (html, None) com o mapa de bolhas, ou (None, aviso) se não houver dados."""
+    registrar_falta()
+    # folium (e components.map, que depende dele) só é importado quando um mapa
+    # precisa ser montado: a primeira pintura e os acertos no LRU não pagam a importação
+    from components.map import montar_mapa
+
+    return montar_mapa(DATASETS[dataset], snapshot(dataset, cenario, ano), load_base('aeroportos'), ano, target_icao)
+
+# --- Gráfico (figura montada em cache) ---
+# A figura de cada série (base e ICAO, ou Total Brasil) é montada uma vez e guardada em um
+# LRU limitado: split observado/projeção, rótulos de hover e ticks do eixo Y deixam
+# de ser recalculados a cada rerun. O st.plotly_chart recebe a go.Figure já validada
+# (um dict seria revalidado pelo Streamlit, reconstruindo a figura a cada chamada).
+GRAFICO_CACHE_MAX = 128
+
+@cache_instrumentado('render_grafico')
+@st.cache_resource(max_entries=GRAFICO_CACHE_MAX, show_spinner=False)
+def render_grafico(dataset, icao=None):
+    """(go.Figure, bytes do JSON) da série do Total Brasil (icao=None) ou do aeroporto."""
+    registrar_falta()
+    # plotly (via components.chart) só é importado quando uma figura precisa ser montada
+    from components.chart import montar_grafico
+
+    fig = montar_grafico(DATASETS[dataset], serie(dataset, icao))
+    # Tamanho medido uma vez, com a figura: a serialização não se repete a cada rerun
+    return fig, len(fig.to_json().encode())
+
+@cache_instrumentado('grafico_vazio')
+@st.cache_resource(show_spinner=False)
+def grafico_vazio(dataset):
+    """(go.Figure, bytes do JSON) só com os eixos (base sem dados ou aeroporto não selecionado)."""
+    registrar_falta()
+    from components.chart import montar_grafico
+
+    fig = montar_grafico(DATASETS[dataset], {})
+    return fig, len(fig.to_json().encode())
+
+@st.cache_resource(show_spinner=False)
+def aquecer_graficos():
+    """Pré-monta o Total Brasil de todas as bases (executado uma vez por processo)."""
+    for nome, spec in DATASETS.items():
+        if spec['metrica'] and tem_dados(load_cube(nome)):
+            render_grafico(nome)
 
 # --- Carregamento de Dados e Ajustes ---
-aeroportos = load_aisweb()
-pax_mercado = load_pax_mercado()
-pax_internacional = load_pax_internacional()
-carga = load_carga() # Agora definido!
+# As bases são carregadas sob demanda (load_cube/load_base em components/data.py),
+# só quando a seleção da sidebar, o mapa ou os cartões precisam delas.
 
-aeroportos = aeroportos.rename(columns={'ICAO': 'ICAO','CIDADE': 'Cidade','UF': 'UF','LAT': 'lat','LONG': 'lon'})
+# Pré-montagem opcional dos gráficos (ex.: AQUECER_GRAFICOS=1 streamlit run src/app.py)
+if os.environ.get('AQUECER_GRAFICOS') == '1':
+    aquecer_graficos()
 
 # Header principal
 st.markdown("""
@@ -338,7 +197,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Sidebar ---
-with st.sidebar:
+with st.sidebar, secao('sidebar'):
     st.markdown("### Configurações de Análise")
     
     tipo_projecao = st.selectbox(
@@ -369,57 +228,18 @@ with st.sidebar:
             ['Doméstica', 'Internacional']
         )
 
-    # Lógica de carregamento de base
-    df_base = pd.DataFrame()
-    coluna_icao = ''
-    coluna_valor = ''
-    y_label = ''
-    
-    if tipo_projecao == 'Carga':
-        if natureza_carga == 'Internacional':
-            df_base = load_carga_internacional()
-            coluna_icao = 'icao'
-            coluna_valor = 'carga_(kg)'
-            y_label = 'Carga Internacional (kg)'
-        else:  # Doméstica
-            df_base = carga
-            coluna_icao = 'icao'
-            coluna_valor = 'carga_(kg)'
-            y_label = 'Carga Doméstica (kg)'
-    
-    elif tipo_projecao == 'Movimentação de Aeronaves':
-        df_base = load_mov_aeronaves_pan_domestico()
-        coluna_icao = 'icao'
-        coluna_valor = 'movimentacao'
-        y_label = 'Movimentação de Aeronaves'
-        
-    elif tipo_projecao == 'Passageiros':
-        if natureza_pax == 'Internacional':
-            df_base = pax_internacional
-            coluna_icao = 'icao'
-            coluna_valor = 'passageiros'
-            y_label = 'Passageiros'
-            
-        elif tipo_rede == 'Mercado (Rede Atual)':
-            df_base = pax_mercado
-            coluna_icao = 'airport_id'
-            coluna_valor = 'total_movimento'
-            y_label = 'Passageiros'
-        else:  # Doméstico e PAN
-            df_base = load_pax_pan_domestico()
-            coluna_icao = 'icao'
-            coluna_valor = 'passageiros'
-            y_label = 'Passageiros'
-
-    # O conversor manual foi removido, a coluna já deve ser numérica.
-    
-    if not df_base.empty:
-        # Limpa ICAO e faz o filtro de aeroportos disponíveis
-        df_base[coluna_icao] = df_base[coluna_icao].astype(str).str.upper().str.strip()
-        aeroportos_disponiveis = sorted(df_base[coluna_icao].astype(str).unique())
-        aeroportos_filtrados = aeroportos[aeroportos['ICAO'].isin(aeroportos_disponiveis)]
-    else:
-        aeroportos_filtrados = aeroportos
+    # Lógica de carregamento de base (seleção -> entrada do registro DATASETS)
+    dataset = escolher_base(tipo_projecao, natureza_pax, tipo_rede, natureza_carga)
+
+    spec = DATASETS[dataset]
+    # Só o cubo (mapeado do artefato em disco) é carregado; a base completa fica de fora
+    with secao('carga'):
+        cube = load_cube(dataset)
+    tem_base = tem_dados(cube)
+    coluna_valor = spec['metrica']
+
+    # Índice UF -> Cidade -> ICAO dos aeroportos da base, montado uma vez com o cubo
+    seletor = cube['seletor']
 
     # Seletor de escopo - 'Total Brasil'
     escopo = st.selectbox(
@@ -428,312 +248,99 @@ with st.sidebar:
     )
 
     icao = None 
-    df = pd.DataFrame()
+    # Série exibida (gráfico e cartões) - {cenario: (anos, valores)}, vazia sem dados
+    pontos = {}
     titulo = "Selecione uma projeção válida"
     
     # Lógica para definir o título
     if escopo == 'Aeroporto Específico':
         st.markdown("### Localização")
         
-        if aeroportos_filtrados.empty:
+        if not seletor['ufs']:
             st.warning("Nenhum aeroporto encontrado na projeção selecionada.")
         else:
-            ufs = sorted(aeroportos_filtrados['UF'].unique())
-            uf = st.selectbox('UF', ufs)
-            cidades = sorted(aeroportos_filtrados[aeroportos_filtrados['UF'] == uf]['Cidade'].unique())
-            cidade = st.selectbox('Cidade', cidades)
-            icaos = sorted(aeroportos_filtrados[(aeroportos_filtrados['UF'] == uf) & (aeroportos_filtrados['Cidade'] == cidade)]['ICAO'].unique())
-            icao = st.selectbox('ICAO', icaos)
+            # Busca direta por ICAO, nome ou cidade (prefixo), alternativa à cascata
+            busca = st.text_input('Buscar aeroporto (ICAO, nome ou cidade)')
+            encontrados = buscar_aeroportos(cube, busca) if busca.strip() else []
+            if busca.strip() and not encontrados:
+                st.caption("Nenhum aeroporto encontrado para a busca.")
+
+            if encontrados:
+                icao = st.selectbox(
+                    'Resultado da busca', encontrados,
+                    format_func=lambda i: f"{i} - {seletor['local'][i][2] or seletor['local'][i][1]}"
+                )
+                uf, cidade, _ = seletor['local'][icao]
+            else:
+                uf = st.selectbox('UF', seletor['ufs'])
+                cidade = st.selectbox('Cidade', seletor['cidades'][uf])
+                icao = st.selectbox('ICAO', seletor['icaos'][(uf, cidade)])
             
-            if not df_base.empty and icao and icao in df_base[coluna_icao].unique():
-                df = df_base[df_base[coluna_icao] == icao].copy()
-
-            if tipo_projecao == 'Carga':
-                if natureza_carga == 'Internacional':
-                    titulo = f'Carga Internacional - {icao}'
-                else:
-                    titulo = f'Carga Doméstica - {icao}'
-            elif tipo_projecao == 'Movimentação de Aeronaves':
-                titulo = f'Movimentação de Aeronaves (PAN) - {icao}'
-            elif tipo_projecao == 'Passageiros':
-                if natureza_pax == 'Internacional':
-                    titulo = f'Passageiros Internacionais - {icao}'
-                elif tipo_rede == 'Mercado (Rede Atual)':
-                    titulo = f'Passageiros Domésticos - Mercado (Rede Atual) - {icao}'
-                else:
-                    titulo = f'Passageiros Domésticos (PAN) - {icao}'
+            if icao and tem_icao(cube, icao):
+                pontos = serie(dataset, icao)
+
+            titulo = f"{spec['titulo']} - {icao}"
             
             st.markdown(f"**Aeroporto:** {icao} - {cidade}/{uf}")
         
     else:  # Total Brasil
-        if not df_base.empty:
-            df = df_base.groupby(['ano', 'cenario'])[coluna_valor].sum().reset_index()
+        if tem_base:
+            pontos = serie(dataset)
         
-        if tipo_projecao == 'Carga':
-            if natureza_carga == 'Internacional':
-                titulo = 'Carga Internacional - Total Brasil'
-            else:
-                titulo = 'Carga Doméstica - Total Brasil'
-        elif tipo_projecao == 'Movimentação de Aeronaves':
-            titulo = 'Movimentação de Aeronaves (PAN) - Total Brasil'
-        elif tipo_projecao == 'Passageiros':
-            if natureza_pax == 'Internacional':
-                titulo = 'Passageiros Internacionais - Total Brasil'
-            elif tipo_rede == 'Mercado (Rede Atual)':
-                titulo = 'Passageiros Domésticos - Mercado (Rede Atual) - Total Brasil'
-            else:
-                titulo = 'Passageiros Domésticos (PAN) - Total Brasil'
+        titulo = f"{spec['titulo']} - Total Brasil"
         
         st.markdown('**Escopo:** Total Brasil')
 
+# Exportação em lote: todos os aeroportos x cenários x anos em um .zip, gerado a
+# partir do cubo uma vez por versão dos dados (ver utils/export.py). Seção própria na
+# instrumentação: gerar o arquivo não entra no tempo da sidebar.
+with st.sidebar, secao('exportacao'):
+    st.markdown("### Exportação")
+    formato_exportacao = st.selectbox('Formato do arquivo', list(FORMATOS), format_func=FORMATOS.get)
+    todas_as_bases = st.checkbox('Todas as bases', value=False)
+    bases_exportacao = [n for n, s in DATASETS.items() if s['metrica']] if todas_as_bases else [dataset]
+    chave_exportacao = f"exportacao:{formato_exportacao}:{','.join(bases_exportacao)}"
+    if st.button('Preparar exportação'):
+        with st.spinner('Gerando arquivo...'):
+            try:
+                st.session_state[chave_exportacao] = arquivo_exportacao(bases_exportacao, formato_exportacao)
+            except Exception as e:
+                st.error(f"Erro ao gerar a exportação. Detalhe: {e}")
+    caminho_exportacao = st.session_state.get(chave_exportacao)
+    if caminho_exportacao and os.path.exists(caminho_exportacao):
+        with open(caminho_exportacao, 'rb') as arquivo:
+            st.download_button(
+                f'Baixar {FORMATOS[formato_exportacao]} (.zip)', arquivo,
+                file_name=os.path.basename(caminho_exportacao), mime='application/zip'
+            )
+
 # --- Layout Principal: GRÁFICO E MAPA LADO A LADO ---
 
 st.markdown("---")
 col_grafico, col_mapa = st.columns([2, 1]) 
 
 # --- Coluna 1: GRÁFICO (2/3 da largura) ---
-with col_grafico:
+with col_grafico, secao('grafico'):
     st.markdown(f'<h2 class="content-title">{titulo}</h2>', unsafe_allow_html=True)
     
-    fig = go.Figure()
-
-    if not df.empty:
-        df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
-        df[coluna_valor] = pd.to_numeric(df[coluna_valor], errors='coerce').fillna(0)
-        df = df.dropna(subset=['ano'])
-
-        df['cenario'] = df['cenario'].astype(str)
-        df_hist = df[df['cenario'].str.lower() == 'observado']
-        df_proj = df[df['cenario'].str.lower() != 'observado']
-
-        # Determina o range do eixo Y com base no máximo dos dados (adapta acima do máximo)
-        max_val = df[coluna_valor].max()
-        yaxis_range = None
-        if pd.notna(max_val) and max_val > 0:
-            # margem de 10% acima do máximo, garante que o eixo fique acima do maior ponto
-            yaxis_range = [0, float(max_val) * 1.1]
-
-        # Observado (até 2024)
-        is_carga_chart = (coluna_valor == 'carga_(kg)')
-        if not df_hist.empty:
-            df_hist_ate_2024 = df_hist[df_hist['ano'] <= 2024]
-            if not df_hist_ate_2024.empty:
-                # prepare formatted hover values using fmt()
-                hist_hover = [fmt(v, is_carga_chart) for v in df_hist_ate_2024[coluna_valor]]
-                fig.add_trace(
-                    go.Scatter(
-                        x=df_hist_ate_2024['ano'],
-                        y=df_hist_ate_2024[coluna_valor],
-                        mode='lines+markers',
-                        name='Observado',
-                        line=dict(color='#6C757D', width=2, dash='dot'),
-                        marker=dict(size=5, color='#6C757D'),
-                        customdata=hist_hover,
-                        hovertemplate='<b>Observado</b><br>Ano: %{x}<br>Valor: %{customdata}<extra></extra>'
-                    )
-                )
-
-        # Projeções (2025–2054)
-        cores_projecao = {'Tendencial':'#0D6EFD', 'Transformador':'#2CA02C', 'Pessimista':'#FFD000'}
-        for cenario_nome, cor in cores_projecao.items():
-            serie = df_proj[(df_proj['cenario'] == cenario_nome) & (df_proj['ano'] >= 2025)]
-            if not serie.empty:
-                proj_hover = [fmt(v, is_carga_chart) for v in serie[coluna_valor]]
-                fig.add_trace(
-                    go.Scatter(
-                        x=serie['ano'],
-                        y=serie[coluna_valor],
-                        mode='lines+markers',
-                        name=cenario_nome,
-                        line=dict(color=cor, width=2.5),
-                        marker=dict(size=7, color=cor),
-                        customdata=proj_hover,
-                        hovertemplate=f'<b>{cenario_nome}</b><br>Ano: %{{x}}<br>Valor: %{{customdata}}<extra></extra>'
-                    )
-                )
-
-    # Build y-axis tick labels (dots thousands) but keep years untouched on x-axis
-    import math
-    def nice_ticks(start, end, max_ticks=6):
-        span = float(end) - float(start)
-        if span <= 0:
-            return [int(start), int(end)]
-        raw_step = span / (max_ticks - 1)
-        exp = math.floor(math.log10(raw_step))
-        base = raw_step / (10 ** exp)
-        multipliers = [1, 2, 2.5, 5, 10]
-        best = multipliers[-1]
-        for m in multipliers:
-            if base <= m:
-                best = m
-                break
-        step = best * (10 ** exp)
-        nice_start = math.floor(start / step) * step
-        nice_end = math.ceil(end / step) * step
-        vals = []
-        v = nice_start
-        while v <= nice_end + 1e-9:
-            vals.append(int(round(v)))
-            v += step
-        return vals
-
-    try:
-        _max_for_ticks = float(yaxis_range[1]) if yaxis_range is not None else (float(df[coluna_valor].max()) if not df.empty else 1)
-    except Exception:
-        _max_for_ticks = 1
-
-    tickvals = nice_ticks(0, max(1, int(math.ceil(_max_for_ticks))), max_ticks=6)
-    def _fmt_dot(x):
-        try:
-            s = f"{int(round(x)):,}"
-            return s.replace(',', '.')
-        except Exception:
-            return str(x)
-    ticktext = [_fmt_dot(v) for v in tickvals]
-
-    # Configurar layout do gráfico
-    fig.update_layout(
-        xaxis=dict(
-            title='Ano', tickmode='linear', dtick=5, gridcolor='#e0e0e0', title_font=dict(size=13, color='#333'), tickfont=dict(size=12),
-            range=[df['ano'].min() if not df.empty and 'ano' in df.columns else 2000, 2055] 
-        ), 
-        yaxis=dict(
-            title=y_label, gridcolor='#e0e0e0', title_font=dict(size=13, color='#333'), 
-            tickvals=tickvals, ticktext=ticktext, tickfont=dict(size=12)                  
-        ), 
-        plot_bgcolor='white', paper_bgcolor='white', font=dict(family="Arial, sans-serif", color='#333', size=12), 
-        legend=dict(
-            orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5, font=dict(size=12)       
-        ),
-        height=600,
-        margin=dict(l=50, r=20, t=20, b=50) 
-    )
-
+    fig, tamanho_grafico = render_grafico(dataset, None if escopo == 'Total Brasil' else icao) if pontos else grafico_vazio(dataset)
     st.plotly_chart(fig, use_container_width=True)
+    registrar_tamanho('grafico', tamanho_grafico)
 
 # --- Coluna 2: MAPA (1/3 da largura) ---
-with col_mapa:
+with col_mapa, secao('mapa'):
     st.markdown('<h2 class="content-title">Cenário Tendencial 2054</h2>', unsafe_allow_html=True)
 
     target_icao = icao if escopo == 'Aeroporto Específico' else None
     
-    if not df_base.empty:
-        
-        # 1. Filtra a base de projeção para o Cenário Tendencial e Ano 2054
-        # Normaliza 'cenario' e 'ano' para evitar problemas de capitalização/formatos
-        df_base_mapa = df_base.copy()
-        if 'cenario' in df_base_mapa.columns:
-            df_base_mapa['cenario'] = df_base_mapa['cenario'].astype(str).str.strip()
-        if 'ano' in df_base_mapa.columns:
-            df_base_mapa['ano'] = pd.to_numeric(df_base_mapa['ano'], errors='coerce')
-
-        # Primeiro tenta usar 2054; se não existir, usa o maior ano disponível para 'Tendencial'
-        df_tend = df_base_mapa[df_base_mapa['cenario'].str.lower() == 'tendencial']
-        if df_tend.empty:
-            df_projecao_mapa = pd.DataFrame()
-        else:
-            if 2054 in df_tend['ano'].values:
-                target_year = 2054
-            else:
-                target_year = int(df_tend['ano'].dropna().max())
-            df_projecao_mapa = df_tend[df_tend['ano'] == target_year].copy()
-        
-        # 2. Agrupa por ICAO
-        # Defensive: ensure expected columns exist (handle case differences or unexpected headers)
-        if coluna_icao not in df_projecao_mapa.columns:
-            ci_matches = [c for c in df_projecao_mapa.columns if c.strip().lower() == coluna_icao.lower()]
-            if ci_matches:
-                df_projecao_mapa = df_projecao_mapa.rename(columns={ci_matches[0]: coluna_icao})
-            else:
-                st.warning(f"Coluna de ICAO '{coluna_icao}' não encontrada na base de projeção. Colunas disponíveis: {list(df_projecao_mapa.columns)}")
-                df_projecao_mapa = pd.DataFrame()
-
-        if not df_projecao_mapa.empty and coluna_valor not in df_projecao_mapa.columns:
-            cv_matches = [c for c in df_projecao_mapa.columns if c.strip().lower() == coluna_valor.lower()]
-            if cv_matches:
-                df_projecao_mapa = df_projecao_mapa.rename(columns={cv_matches[0]: coluna_valor})
-            else:
-                st.warning(f"Coluna de valor '{coluna_valor}' não encontrada na base de projeção. Colunas disponíveis: {list(df_projecao_mapa.columns)}")
-                df_projecao_mapa = pd.DataFrame()
-
-        if not df_projecao_mapa.empty:
-            df_projecao_mapa = df_projecao_mapa.groupby([coluna_icao]).agg({coluna_valor: 'sum'}).reset_index()
-            df_projecao_mapa = df_projecao_mapa.rename(columns={coluna_valor: 'volume_2054'})
-        
-        # 3. Junta a projeção com as coordenadas
-        map_data_volume = aeroportos.merge(
-            df_projecao_mapa, 
-            left_on='ICAO', 
-            right_on=coluna_icao, 
-            how='inner'
-        )
-        
+    if tem_base:
         try:
-            # Garante que as coordenadas são floats
-            map_data_volume['lat'] = map_data_volume['lat'].astype(str).str.replace(',', '.').astype(float)
-            map_data_volume['lon'] = map_data_volume['lon'].astype(str).str.replace(',', '.').astype(float)
-            map_data_volume = map_data_volume.dropna(subset=['lat', 'lon', 'volume_2054'])
-            
-            if not map_data_volume.empty and map_data_volume['volume_2054'].sum() > 0:
-                
-                # --- Definição de Raio para Leafmap (Folium) ---
-                map_data_volume['volume_log'] = np.log1p(map_data_volume['volume_2054'].clip(lower=1))
-                
-                MAX_RADIUS = 20
-                min_log = map_data_volume['volume_log'].min()
-                max_log = map_data_volume['volume_log'].max()
-
-                if max_log > min_log:
-                    map_data_volume['raio'] = ((map_data_volume['volume_log'] - min_log) / (max_log - min_log)) * MAX_RADIUS
-                else:
-                    map_data_volume['raio'] = 5 
-                    
-                # 3. Formata o Tooltip
-                is_carga_mapa = (coluna_valor == 'carga_(kg)')
-                map_data_volume['Tooltip_Text'] = map_data_volume.apply(
-                    lambda row: f"<b>{row['ICAO']} - {row['Cidade']}/{row['UF']}</b><br>"
-                               f"Projeção 2054 ({tipo_projecao}): {fmt(row['volume_2054'], is_carga_mapa)}", 
-                    axis=1
-                )
-                
-                # --- Criação do Mapa Leafmap (Folium) ---
-                center_lat = map_data_volume['lat'].mean()
-                center_lon = map_data_volume['lon'].mean()
-                zoom_level = 4
-                
-                if target_icao and target_icao in map_data_volume['ICAO'].values:
-                    target_row = map_data_volume[map_data_volume['ICAO'] == target_icao].iloc[0]
-                    center_lat = target_row['lat']
-                    center_lon = target_row['lon']
-                    zoom_level = 7 
-                    
-                m = folium.Map(
-                    location=[center_lat, center_lon], 
-                    zoom_start=zoom_level, 
-                    control_scale=True, 
-                    tiles='cartodbpositron'
-                )
-                
-                # Adiciona os marcadores (bolhas)
-                for _, row in map_data_volume.iterrows():
-                    cor_fill = '#dc3545' if row['ICAO'] == target_icao else '#0d6efd'
-                    
-                    folium.CircleMarker(
-                        location=(row['lat'], row['lon']),
-                        radius=row['raio'], 
-                        color=cor_fill, 
-                        weight=1,
-                        fill=True,
-                        fill_color=cor_fill, 
-                        fill_opacity=0.6,
-                        tooltip=row['Tooltip_Text']
-                    ).add_to(m)
-
-                folium_static(m, width=700, height=600) 
-
+            mapa_html, aviso = render_mapa(dataset, 'Tendencial', ANO_ALVO, target_icao)
+            if mapa_html is None:
+                st.warning(aviso)
             else:
-                st.warning("Nenhuma coordenada ou volume válido encontrado para o mapa.")
-
+                components.html(mapa_html, width=700, height=MAPA_ALTURA + 10)
+                registrar_tamanho('mapa', len(mapa_html.encode()))
         except Exception as e:
             st.error(f"Erro ao processar as coordenadas ou volumes para o mapa. Detalhe: {e}") 
     else:
@@ -743,59 +350,45 @@ with col_mapa:
 # ---
 ## Métricas
 
-if not df.empty:
+with secao('cartoes'):
+    if pontos:
     
-    col_tenden, col_transf, col_pess = st.columns(3)
+        col_tenden, col_transf, col_pess = st.columns(3)
     
-    is_carga = (coluna_valor == 'carga_(kg)')
-    ano_base = 2025
-    ultimo_ano = 2054
-    periodo = ultimo_ano - ano_base 
+        is_carga = (coluna_valor == 'carga_(kg)')
+        ano_base = ANO_BASE
+        ultimo_ano = ANO_ALVO
     
-    cenarios_cartoes = [
-        ('Tendencial', '#0D6EFD', col_tenden), 
-        ('Transformador', '#2CA02C', col_transf), 
-        ('Pessimista', '#FFD000', col_pess)
-    ]
-
-    for nome, cor, coluna in cenarios_cartoes:
-        serie = df[df['cenario'] == nome]
-        
-        v2054_series = serie.loc[serie['ano'] == ultimo_ano, coluna_valor]
-        v2025_series = serie.loc[serie['ano'] == ano_base, coluna_valor]
+        cenarios_cartoes = [
+            ('Tendencial', '#0D6EFD', col_tenden), 
+            ('Transformador', '#2CA02C', col_transf), 
+            ('Pessimista', '#FFD000', col_pess)
+        ]
+
+        # Valores de 2025/2054 e CAGR de todos os cenários, pré-calculados com o cubo
+        resumo_cenarios = resumo(dataset, icao if escopo == 'Aeroporto Específico' else None)
+
+        for nome, cor, coluna in cenarios_cartoes:
+            v2054 = cagr = None
+            if nome in resumo_cenarios:
+                linha = resumo_cenarios[nome]
+                if pd.notna(linha['valor_final']): v2054 = linha['valor_final']
+                if pd.notna(linha['cagr']): cagr = linha['cagr']
         
-        v2054 = v2054_series.squeeze() if not v2054_series.empty else None
-        v2025 = v2025_series.squeeze() if not v2025_series.empty else None
-        
-        if isinstance(v2054, (float, np.float64)) and np.isnan(v2054): v2054 = None
-        if isinstance(v2025, (float, np.float64)) and np.isnan(v2025): v2025 = None
-        
-        cagr = None
-        # Cálculo do CAGR
-        if v2054 is not None and v2025 is not None and v2025 > 0 and v2054 >= 0 and periodo > 0:
-            try:
-                cagr = ((v2054 / v2025) ** (1/periodo) - 1) * 100
-            except: cagr = 0.0 
-        elif v2054 is not None and v2025 is not None and v2025 == 0 and v2054 > 0:
-            cagr = float('inf')
-        elif v2054 is not None and v2025 is not None and v2025 == 0 and v2054 == 0:
-             cagr = 0.0
-        
-        valor_fmt = fmt(v2054, is_carga)
-        # Formatação do CAGR para padrão BR (ponto decimal substituído por vírgula)
-        cagr_fmt = f"{cagr:.2f}%".replace('.', ',') if cagr is not None and cagr != float('inf') else "N/A"
-        if cagr == float('inf'): cagr_fmt = "Crescimento Ilimitado" 
-
-        with coluna: # Insere o cartão na coluna específica
-            st.markdown(f"""
-                <div class="metric-card" style="border-left: 8px solid {cor};">
-                    <h4 style="color:{cor};">{nome}</h4>
-                    <p class="main-value" style="color:{cor};">{cagr_fmt}</p>
-                    <p class="small-text">Taxa Média Anual ({ano_base}–{ultimo_ano})</p>
-                    <hr>
-                    <p class="sub-value">Projeção {ultimo_ano}: <strong>{valor_fmt}</strong></p>
-                </div>
-                """, unsafe_allow_html=True)
+            valor_fmt = fmt(v2054, is_carga)
+            # Formatação do CAGR para padrão BR (ponto decimal substituído por vírgula)
+            cagr_fmt = fmt_cagr(cagr)
+
+            with coluna: # Insere o cartão na coluna específica
+                st.markdown(f"""
+                    <div class="metric-card" style="border-left: 8px solid {cor};">
+                        <h4 style="color:{cor};">{nome}</h4>
+                        <p class="main-value" style="color:{cor};">{cagr_fmt}</p>
+                        <p class="small-text">Taxa Média Anual ({ano_base}–{ultimo_ano})</p>
+                        <hr>
+                        <p class="sub-value">Projeção {ultimo_ano}: <strong>{valor_fmt}</strong></p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
 
 # ---
@@ -807,3 +400,20 @@ st.markdown("""
     <p><strong>Última Atualização:</strong> Outubro/2025</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Relatório de inicialização (primeira execução do processo; ver src/startup_report.py)
+registrar_inicializacao(time.perf_counter() - INICIO_SCRIPT)
+
+# Fim da execução: linha de log e, se pedido, painel de depuração na sidebar
+execucao = finalizar_execucao()
+if execucao and (st.query_params.get('debug') == '1' or os.environ.get('DEBUG_PAINEL') == '1'):
+    with st.sidebar.expander('Depuração', expanded=True):
+        st.markdown('**Seções (ms)**')
+        st.table(pd.Series(execucao['secoes_ms'], name='ms'))
+        if execucao['cache']:
+            st.markdown('**Caches (acertos / faltas)**')
+            st.table(pd.DataFrame(execucao['cache']).T)
+        if execucao['bytes']:
+            st.markdown('**Enviado ao navegador (KiB)**')
+            st.table(pd.Series({k: round(v / 1024, 1) for k, v in execucao['bytes'].items()}, name='KiB'))
+        st.caption('Cargas do processo: ' + ('; '.join(relatorio_carga()) or 'nada'))
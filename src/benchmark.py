@@ -0,0 +1,224 @@
+"""Benchmark dos caminhos de carga, agregação e renderização do app, fora do Streamlit.
+
+Para cada base de projeção e cada escala (1 = CSVs de src/data; 10 e 100 = arquivos
+sintéticos com as linhas repetidas N vezes, cada cópia com ICAOs próprios, repetidos
+também na tabela de aeroportos para que o mapa e os seletores cresçam junto) mede o
+tempo (o menor de --repeticoes execuções) e o pico de memória (tracemalloc) de cada
+etapa: leitura do CSV, conversão numérica BR, agregação do Total Brasil, montagem do
+cubo, consultas (utils/query.py), dados do mapa, figura do gráfico e HTML do mapa.
+Na escala 1 mede também as cargas servidas pelos caches (Parquet e cubo mapeado).
+
+Os resultados podem ser gravados em JSON (--saida) e usados como referência em uma
+execução seguinte (--comparar): o script sai com código 1 se alguma etapa ficar mais
+lenta ou usar mais memória que a referência além da --tolerancia.
+
+Uso (a partir da raiz do repositório):
+    python src/benchmark.py [--bases pax_mercado carga] [--escalas 1 10 100] [--repeticoes 3]
+                            [--saida resultados.json] [--comparar referencia.json]
+"""
+import argparse
+import gc
+import glob
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from components.chart import montar_grafico
+from components.map import dados_mapa, montar_mapa
+from utils.aggregates import ANO_ALVO, build_cube, icaos_disponiveis
+from utils.csv_sniffer import detect_dialect
+from utils.cube_cache import read_cube
+from utils.data_loader import DATASETS, clean_numeric_series, load_dataset, parse_dataset
+from utils.parquet_cache import CACHE_DIR, file_hash
+from utils.query import resumo_cubo, serie_cubo, snapshot_cubo
+
+# Arquivos sintéticos, gerados uma vez por versão do CSV de origem
+SINTETICOS_DIR = os.path.join(CACHE_DIR, 'benchmark')
+ESCALAS = [1, 10, 100]
+TOLERANCIA = 0.25
+# Diferenças de tempo abaixo disto são ruído de medição e não contam como regressão
+FOLGA_SEGUNDOS = 0.002
+
+
+# --- Arquivos Sintéticos ---
+def _dialeto(nome):
+    spec = DATASETS[nome]
+    dialeto = detect_dialect(spec['arquivo'])
+    return spec.get('sep', dialeto['sep']), spec.get('encoding', dialeto['encoding'])
+
+
+def arquivo_sintetico(nome, fator):
+    """CSV da base com as linhas repetidas fator vezes; a cópia k recebe os ICAOs '<icao>-k'
+    (ver aeroportos_sinteticos para a tabela de aeroportos correspondente)."""
+    spec = DATASETS[nome]
+    if fator == 1:
+        return spec['arquivo']
+
+    digest = file_hash(spec['arquivo'])[:16]
+    destino = os.path.join(SINTETICOS_DIR, f'{nome}-x{fator}-{digest}.csv')
+    if os.path.exists(destino):
+        return destino
+
+    sep, encoding = _dialeto(nome)
+    bruto = pd.read_csv(spec['arquivo'], sep=sep, encoding=encoding, dtype=str, keep_default_na=False)
+    coluna_icao = bruto.columns[next(pos for pos, coluna in spec['colunas'].items() if coluna == 'icao')]
+    copias = [bruto]
+    for k in range(1, fator):
+        copia = bruto.copy()
+        copia[coluna_icao] = copia[coluna_icao] + f'-{k}'
+        copias.append(copia)
+
+    os.makedirs(SINTETICOS_DIR, exist_ok=True)
+    for antigo in glob.glob(os.path.join(SINTETICOS_DIR, f'{nome}-x{fator}-*.csv')):
+        os.remove(antigo)
+    tmp = f'{destino}.{os.getpid()}.tmp'
+    pd.concat(copias, ignore_index=True).to_csv(tmp, sep=sep, encoding=encoding, index=False)
+    os.replace(tmp, destino)
+    return destino
+
+
+def aeroportos_sinteticos(aeroportos, fator):
+    """Tabela de aeroportos com cada aeroporto repetido fator vezes, a cópia k com o ICAO
+    '<icao>-k' (mesmas coordenadas e localidade): com ela o mapa e o índice dos seletores
+    do cubo crescem junto com os arquivos sintéticos."""
+    if fator == 1:
+        return aeroportos
+    copias = [aeroportos]
+    for k in range(1, fator):
+        copia = aeroportos.copy()
+        copia.index = copia.index + f'-{k}'
+        copias.append(copia)
+    return pd.concat(copias)
+
+
+def _metrica_como_texto(nome, path):
+    # Coluna da métrica como chega do CSV (texto no formato BR), entrada de clean_numeric_series
+    spec = DATASETS[nome]
+    sep, encoding = _dialeto(nome)
+    posicao = next(pos for pos, coluna in spec['colunas'].items() if coluna == spec['metrica'])
+    return pd.read_csv(path, sep=sep, encoding=encoding, usecols=[posicao], dtype=str).iloc[:, 0]
+
+
+# --- Etapas Medidas ---
+def etapas(nome, escala, aeroportos):
+    """Lista de (etapa, função sem argumentos) de uma base em uma escala."""
+    spec = DATASETS[nome]
+    metrica = spec['metrica']
+    path = arquivo_sintetico(nome, escala)
+    aeroportos = aeroportos_sinteticos(aeroportos, escala)
+
+    df = parse_dataset(nome, path)
+    texto = _metrica_como_texto(nome, path)
+    cube = build_cube(df, metrica, aeroportos)
+    icaos = icaos_disponiveis(cube)
+    icao = icaos[0] if len(icaos) else None
+    valores = snapshot_cubo(cube, 'Tendencial', ANO_ALVO)
+    total, aeroporto = serie_cubo(cube), serie_cubo(cube, icao)
+
+    lista = []
+    if escala == 1:
+        # Cargas do app: Parquet e cubo mapeado (gerados aqui na primeira vez)
+        construir = lambda: build_cube(load_dataset(nome), metrica, aeroportos)
+        read_cube(nome, construir)
+        lista += [
+            ('load_dataset (Parquet)', lambda: load_dataset(nome)),
+            ('read_cube (mmap)', lambda: read_cube(nome, construir)),
+        ]
+    lista += [
+        ('parse_dataset (CSV)', lambda: parse_dataset(nome, path)),
+        ('clean_numeric_series', lambda: clean_numeric_series(texto)),
+        ('groupby Total Brasil', lambda: df.groupby(['ano', 'cenario'], observed=True)[metrica].sum()),
+        ('build_cube', lambda: build_cube(df, metrica, aeroportos)),
+        ('consulta série', lambda: (serie_cubo(cube), serie_cubo(cube, icao))),
+        ('consulta snapshot', lambda: snapshot_cubo(cube, 'Tendencial', ANO_ALVO)),
+        ('consulta resumo', lambda: (resumo_cubo(cube), resumo_cubo(cube, icao))),
+        ('dados_mapa', lambda: dados_mapa(spec, valores, aeroportos, ANO_ALVO)),
+        ('gráfico Total Brasil', lambda: montar_grafico(spec, total)),
+        ('gráfico aeroporto', lambda: montar_grafico(spec, aeroporto)),
+        ('HTML do mapa', lambda: montar_mapa(spec, valores, aeroportos, ANO_ALVO, icao)),
+    ]
+    return lista
+
+
+def medir(funcao, repeticoes):
+    """Menor tempo de repeticoes execuções e pico de memória de uma execução extra."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    # Medido à parte: o tracemalloc deixa a execução mais lenta
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tempos), pico
+
+
+# --- Comparação com a Referência ---
+def regressoes(resultados, referencia, tolerancia):
+    """Etapas mais lentas ou com mais memória que na referência (além da tolerância)."""
+    anteriores = {(r['base'], r['escala'], r['etapa']): r for r in referencia}
+    falhas = []
+    for r in resultados:
+        ref = anteriores.get((r['base'], r['escala'], r['etapa']))
+        if ref is None:
+            continue
+        nome = f"{r['base']} x{r['escala']} {r['etapa']}"
+        if r['segundos'] > ref['segundos'] * (1 + tolerancia) + FOLGA_SEGUNDOS:
+            falhas.append(f"{nome}: {r['segundos'] * 1000:.1f} ms (referência {ref['segundos'] * 1000:.1f} ms)")
+        if r['pico_bytes'] > ref['pico_bytes'] * (1 + tolerancia):
+            falhas.append(f"{nome}: pico {r['pico_bytes'] / 1024 ** 2:.1f} MiB (referência {ref['pico_bytes'] / 1024 ** 2:.1f} MiB)")
+    return falhas
+
+
+def main():
+    bases = [nome for nome, spec in DATASETS.items() if spec['metrica']]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bases', nargs='+', choices=bases, default=bases)
+    parser.add_argument('--escalas', nargs='+', type=int, default=ESCALAS)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help='grava os resultados em JSON')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior usado como referência')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='aumento relativo aceito em tempo e memória (padrão: 0.25)')
+    args = parser.parse_args()
+
+    # Avisos de conversão e do folium (repetidos a cada execução) não interessam aqui
+    logging.disable(logging.WARNING)
+    warnings.simplefilter('ignore')
+
+    aeroportos = load_dataset('aeroportos')
+    resultados = []
+    print(f"{'base':<28} {'escala':>6}  {'etapa':<24} {'tempo':>11} {'pico':>11}")
+    for nome in args.bases:
+        for escala in args.escalas:
+            for etapa, funcao in etapas(nome, escala, aeroportos):
+                segundos, pico = medir(funcao, max(1, args.repeticoes))
+                resultados.append({'base': nome, 'escala': escala, 'etapa': etapa,
+                                   'segundos': segundos, 'pico_bytes': pico})
+                print(f'{nome:<28} {"x" + str(escala):>6}  {etapa:<24} {segundos * 1000:8.1f} ms {pico / 1024 ** 2:7.1f} MiB')
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=1, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            falhas = regressoes(resultados, json.load(f), args.tolerancia)
+        for falha in falhas:
+            print(f'REGRESSÃO: {falha}')
+        sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Gera os artefatos de serviço de todas as bases do registro (utils/data_loader.DATASETS):
+o cache colunar (Parquet) de cada CSV e o cubo pré-agregado (totais, por ICAO/UF,
+resumos e índice dos seletores) de cada base de projeção.
+
+As bases são processadas em paralelo, uma por processo. Bases cujas fontes não
+mudaram são puladas, então rodar de novo sem CSVs novos não refaz nada.
+
+Uso (a partir da raiz do repositório):
+    python src/build_cache.py [--processos N]
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from utils.cube_cache import build_cube_artifact
+from utils.data_loader import DATASETS, parse_dataset, spec_version
+from utils.parquet_cache import build_all
+
+
+def processar(nome):
+    """Parquet e, nas bases de projeção, cubo de uma base (executado em um processo do pool)."""
+    spec = DATASETS[nome]
+    entrada = (nome, spec['arquivo'], partial(parse_dataset, nome), spec_version(nome))
+    artefatos = [build_all([entrada])[nome]]
+    if spec['metrica']:
+        artefatos.append(build_cube_artifact(nome))
+    return artefatos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processos', type=int, default=os.cpu_count(),
+                        help='processos em paralelo (padrão: número de CPUs)')
+    args = parser.parse_args()
+
+    # Detecção de dialeto (gravada em disco) e tabela de aeroportos antes do pool: os
+    # cubos de todas as bases dependem dela
+    for nome in DATASETS:
+        spec_version(nome)
+    resultados = {'aeroportos': processar('aeroportos')}
+
+    projecoes = [nome for nome, spec in DATASETS.items() if spec['metrica']]
+    with ProcessPoolExecutor(max_workers=max(1, args.processos)) as pool:
+        resultados.update(zip(projecoes, pool.map(processar, projecoes)))
+
+    for nome, artefatos in resultados.items():
+        for target, rebuilt in artefatos:
+            status = 'gerado' if rebuilt else 'já atualizado'
+            print(f'{nome} -> {target} [{status}]')
+
+
+if __name__ == '__main__':
+    main()
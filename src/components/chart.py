@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.formatters import fmt_br_array, fmt_dot
+
+
+# --- Ticks do Eixo Y ---
+def nice_ticks(start, end, max_ticks=6):
+    span = float(end) - float(start)
+    if span <= 0:
+        return [int(start), int(end)]
+    raw_step = span / (max_ticks - 1)
+    exp = math.floor(math.log10(raw_step))
+    base = raw_step / (10 ** exp)
+    multipliers = [1, 2, 2.5, 5, 10]
+    best = multipliers[-1]
+    for m in multipliers:
+        if base <= m:
+            best = m
+            break
+    step = best * (10 ** exp)
+    nice_start = math.floor(start / step) * step
+    nice_end = math.ceil(end / step) * step
+    vals = []
+    v = nice_start
+    while v <= nice_end + 1e-9:
+        vals.append(int(round(v)))
+        v += step
+    return vals
+
+
+# --- Gráfico de Séries (observado e cenários de projeção) ---
+def montar_grafico(spec, pontos):
+    """go.Figure de uma série {cenario: (anos, valores)} (ver utils/query.serie); sem
+    pontos, só os eixos."""
+    coluna_valor = spec['metrica']
+    fig = go.Figure()
+    yaxis_range = None
+    anos_todos = np.concatenate([anos for anos, _ in pontos.values()]) if pontos else np.array([])
+    valores_todos = np.concatenate([valores for _, valores in pontos.values()]) if pontos else np.array([])
+
+    if pontos:
+        # Determina o range do eixo Y com base no máximo dos dados (adapta acima do máximo)
+        max_val = valores_todos.max()
+        if pd.notna(max_val) and max_val > 0:
+            # margem de 10% acima do máximo, garante que o eixo fique acima do maior ponto
+            yaxis_range = [0, float(max_val) * 1.1]
+
+        # Observado (até 2024)
+        is_carga_chart = (coluna_valor == 'carga_(kg)')
+        observado = [pontos[c] for c in pontos if c.lower() == 'observado']
+        if observado:
+            anos = np.concatenate([a for a, _ in observado])
+            valores = np.concatenate([v for _, v in observado])
+            ate_2024 = anos <= 2024
+            if ate_2024.any():
+                # rótulos de hover no padrão BR, formatados de uma vez
+                hist_hover = fmt_br_array(valores[ate_2024], is_carga_chart).tolist()
+                fig.add_trace(
+                    go.Scatter(
+                        x=anos[ate_2024],
+                        y=valores[ate_2024],
+                        mode='lines+markers',
+                        name='Observado',
+                        line=dict(color='#6C757D', width=2, dash='dot'),
+                        marker=dict(size=5, color='#6C757D'),
+                        customdata=hist_hover,
+                        hovertemplate='<b>Observado</b><br>Ano: %{x}<br>Valor: %{customdata}<extra></extra>'
+                    )
+                )
+
+        # Projeções (2025–2054)
+        cores_projecao = {'Tendencial':'#0D6EFD', 'Transformador':'#2CA02C', 'Pessimista':'#FFD000'}
+        for cenario_nome, cor in cores_projecao.items():
+            if cenario_nome not in pontos:
+                continue
+            anos, valores = pontos[cenario_nome]
+            desde_2025 = anos >= 2025
+            if desde_2025.any():
+                proj_hover = fmt_br_array(valores[desde_2025], is_carga_chart).tolist()
+                fig.add_trace(
+                    go.Scatter(
+                        x=anos[desde_2025],
+                        y=valores[desde_2025],
+                        mode='lines+markers',
+                        name=cenario_nome,
+                        line=dict(color=cor, width=2.5),
+                        marker=dict(size=7, color=cor),
+                        customdata=proj_hover,
+                        hovertemplate=f'<b>{cenario_nome}</b><br>Ano: %{{x}}<br>Valor: %{{customdata}}<extra></extra>'
+                    )
+                )
+
+    try:
+        _max_for_ticks = float(yaxis_range[1]) if yaxis_range is not None else (float(valores_todos.max()) if pontos else 1)
+    except Exception:
+        _max_for_ticks = 1
+
+    tickvals = nice_ticks(0, max(1, int(math.ceil(_max_for_ticks))), max_ticks=6)
+    ticktext = [fmt_dot(v) for v in tickvals]
+
+    # Configurar layout do gráfico
+    fig.update_layout(
+        xaxis=dict(
+            title='Ano', tickmode='linear', dtick=5, gridcolor='#e0e0e0', title_font=dict(size=13, color='#333'), tickfont=dict(size=12),
+            range=[anos_todos.min() if pontos else 2000, 2055] 
+        ), 
+        yaxis=dict(
+            title=spec['rotulo_y'], gridcolor='#e0e0e0', title_font=dict(size=13, color='#333'), 
+            tickvals=tickvals, ticktext=ticktext, tickfont=dict(size=12)                  
+        ), 
+        plot_bgcolor='white', paper_bgcolor='white', font=dict(family="Arial, sans-serif", color='#333', size=12), 
+        legend=dict(
+            orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5, font=dict(size=12)       
+        ),
+        height=600,
+        margin=dict(l=50, r=20, t=20, b=50) 
+    )
+
+    return fig
@@ -0,0 +1,76 @@
+import logging
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from utils.aggregates import build_cube
+from utils.data_loader import DATASETS
+from utils.metrics import cache_instrumentado, configurar_logs, registrar_falta
+from utils.query import base, cubo
+
+logger = logging.getLogger(__name__)
+# Relatório de inicialização no log do servidor (ver utils/metrics.configurar_logs)
+configurar_logs(__name__)
+
+# --- Funções de Carregamento (compartilhadas pelo app e pelas páginas) ---
+# Todas as bases são declaradas em utils/data_loader.DATASETS; o carregamento
+# lê o cache colunar (Parquet), refeito apenas quando o CSV de origem muda.
+# Os objetos vêm da camada de consulta (utils/query.py), então o app, as páginas e
+# as consultas sem Streamlit compartilham a mesma base/cubo no processo.
+# st.cache_resource: um único objeto (somente leitura) compartilhado por todas as
+# sessões e páginas, sem o hash/cópia por chamada que o st.cache_data faz.
+# Nada é carregado na importação: cada base/cubo é materializado na primeira vez
+# que uma seleção precisa dele.
+
+# Tempo da primeira carga de cada base/cubo neste processo, na ordem em que
+# aconteceram: {('base' | 'cubo', nome): segundos}. As chamadas seguintes saem do
+# st.cache_resource e não passam por aqui (acertos e faltas: utils/metrics.py).
+TEMPOS_CARGA = {}
+_inicializacao = {}
+
+
+@cache_instrumentado('load_base')
+@st.cache_resource
+def load_base(nome):
+    registrar_falta()
+    inicio = time.perf_counter()
+    try:
+        return base(nome)
+    except Exception as e:
+        st.error(f"Erro ao carregar {os.path.basename(DATASETS[nome]['arquivo'])}: {e}")
+        return pd.DataFrame()
+    finally:
+        TEMPOS_CARGA[('base', nome)] = time.perf_counter() - inicio
+
+@cache_instrumentado('load_cube')
+@st.cache_resource
+def load_cube(nome):
+    """Agregados da base (Total Brasil, por ICAO e por UF), lidos do artefato gerado por
+    build_cache.py ou montados (e gravados) quando a base ou os aeroportos mudaram."""
+    registrar_falta()
+    inicio = time.perf_counter()
+    try:
+        return cubo(nome)
+    except Exception as e:
+        # Base ilegível: cubo vazio, e o app mostra que não há dados
+        st.error(f"Erro ao carregar {os.path.basename(DATASETS[nome]['arquivo'])}: {e}")
+        return build_cube(pd.DataFrame(), DATASETS[nome]['metrica'], pd.DataFrame())
+    finally:
+        TEMPOS_CARGA[('cubo', nome)] = time.perf_counter() - inicio
+
+
+# --- Relatório de Inicialização ---
+def relatorio_carga():
+    """Linhas '<tipo> <nome>: <ms>' do que já foi materializado neste processo."""
+    return [f'{tipo} {nome}: {segundos * 1000:.1f} ms' for (tipo, nome), segundos in TEMPOS_CARGA.items()]
+
+
+def registrar_inicializacao(segundos):
+    """Registra (uma vez por processo) a duração da primeira execução e o que ela carregou."""
+    if _inicializacao:
+        return
+    _inicializacao['segundos'] = segundos
+    _inicializacao['carregado'] = dict(TEMPOS_CARGA)
+    logger.info('Primeira execução em %.0f ms; carregado: %s', segundos * 1000, '; '.join(relatorio_carga()) or 'nada')
@@ -1,31 +1,116 @@
-import streamlit as st
-import pandas as pd
 import folium
-from folium import Marker
-
-def load_airport_data():
-    # Load the airport data from the CSV file
-    airport_data = pd.read_csv('src/data/AISWEB_Aeroportos.csv')
-    return airport_data
-
-def create_map(selected_airports):
-    # Create a base map
-    m = folium.Map(location=[-14.2350, -51.9253], zoom_start=4)  # Centered on Brazil
-
-    # Add markers for each selected airport
-    for airport in selected_airports:
-        lat = airport['Latitude']
-        lon = airport['Longitude']
-        name = airport['Nome']
-        icao = airport['ICAO']
-        Marker(location=[lat, lon], popup=f"{name} ({icao})").add_to(m)
-
-    return m
-
-def display_map(selected_airports):
-    # Create and display the map
-    if selected_airports:
-        m = create_map(selected_airports)
-        st.write(m._repr_html_(), unsafe_allow_html=True)
+import numpy as np
+import pandas as pd
+from folium.utilities import JsCode
+from utils.formatters import fmt_br_array
+
+# --- Camada de bolhas em lote (GeoJSON) ---
+# Um único FeatureCollection com raio/cor/tooltip nas propriedades de cada ponto;
+# o estilo é aplicado no navegador, então o HTML gerado e o tempo de montagem
+# crescem só com o volume de dados, e não com um objeto folium por aeroporto.
+_ESTILO_BOLHA = JsCode("""
+function(feature, layer) {
+    var p = feature.properties;
+    layer.setRadius(p.raio);
+    layer.setStyle({color: p.cor, fillColor: p.cor});
+    layer.bindTooltip(p.tooltip, {sticky: true});
+}
+""")
+
+
+def camada_bolhas(lat, lon, raio, cor, tooltip, nome='Aeroportos'):
+    """Monta a camada de bolhas a partir de arrays/colunas paralelas (uma posição por aeroporto)."""
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(float(x), 5), round(float(y), 5)]},
+            'properties': {'raio': round(float(r), 2), 'cor': c, 'tooltip': t},
+        }
+        for y, x, r, c, t in zip(lat, lon, raio, cor, tooltip)
+    ]
+    return folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        name=nome,
+        marker=folium.CircleMarker(weight=1, fill=True, fill_opacity=0.6),
+        on_each_feature=_ESTILO_BOLHA,
+    )
+
+
+# --- Mapa de Projeção (bolhas por aeroporto) ---
+MAX_RADIUS = 20
+
+
+def dados_mapa(spec, valores, aeroportos, ano):
+    """Aeroportos com coordenadas e valor de um snapshot por ICAO (ver utils/query.snapshot),
+    com raio da bolha e tooltip já calculados. Vazio se não houver o que mapear."""
+    coluna_valor = spec['metrica']
+
+    # 1. Busca as coordenadas (float32, já convertidas na carga) pelo índice ICAO
+    linhas = aeroportos.index.get_indexer(valores['icao']) if not aeroportos.empty else np.array([], dtype=int)
+    encontrados = linhas >= 0
+    map_data_volume = (
+        aeroportos.iloc[linhas[encontrados]]
+        .assign(volume_2054=valores['valor'][encontrados])
+        .rename_axis('ICAO').reset_index()
+        .dropna(subset=['lat', 'lon', 'volume_2054'])
+    )
+
+    if map_data_volume.empty or map_data_volume['volume_2054'].sum() <= 0:
+        return map_data_volume.iloc[:0]
+
+    # 2. Definição de Raio para Leafmap (Folium)
+    map_data_volume['volume_log'] = np.log1p(map_data_volume['volume_2054'].clip(lower=1))
+
+    min_log = map_data_volume['volume_log'].min()
+    max_log = map_data_volume['volume_log'].max()
+
+    if max_log > min_log:
+        map_data_volume['raio'] = ((map_data_volume['volume_log'] - min_log) / (max_log - min_log)) * MAX_RADIUS
     else:
-        st.warning("Please select at least one airport to display on the map.")
\ No newline at end of file
+        map_data_volume['raio'] = 5
+
+    # 3. Formata o Tooltip (concatenação e formatação BR vetorizadas)
+    is_carga_mapa = (coluna_valor == 'carga_(kg)')
+    map_data_volume['tooltip'] = (
+        '<b>' + map_data_volume['ICAO'] + ' - ' + map_data_volume['Cidade'].astype(str)
+        + '/' + map_data_volume['UF'].astype(str) + f"</b><br>Projeção {ano} ({spec['tipo']}): "
+        + pd.Series(fmt_br_array(map_data_volume['volume_2054'].to_numpy(), is_carga_mapa), index=map_data_volume.index)
+    )
+    return map_data_volume
+
+
+def montar_mapa(spec, valores, aeroportos, ano, target_icao):
+    """Retorna (html, None) com o mapa de bolhas, ou (None, aviso) se não houver dados."""
+    map_data_volume = dados_mapa(spec, valores, aeroportos, ano)
+    if map_data_volume.empty:
+        return None, "Nenhuma coordenada ou volume válido encontrado para o mapa."
+
+    # --- Criação do Mapa Leafmap (Folium) ---
+    center_lat = float(map_data_volume['lat'].mean())
+    center_lon = float(map_data_volume['lon'].mean())
+    zoom_level = 4
+
+    if target_icao and target_icao in map_data_volume['ICAO'].values:
+        target_row = map_data_volume[map_data_volume['ICAO'] == target_icao].iloc[0]
+        center_lat = float(target_row['lat'])
+        center_lon = float(target_row['lon'])
+        zoom_level = 7
+
+    m = folium.Map(
+        location=[center_lat, center_lon],
+        zoom_start=zoom_level,
+        control_scale=True,
+        tiles='cartodbpositron'
+    )
+
+    # Adiciona os marcadores (bolhas) em uma única camada GeoJSON
+    cores = np.where(map_data_volume['ICAO'].to_numpy() == target_icao, '#dc3545', '#0d6efd')
+    camada_bolhas(
+        map_data_volume['lat'].to_numpy(),
+        map_data_volume['lon'].to_numpy(),
+        map_data_volume['raio'].to_numpy(),
+        cores.tolist(),
+        map_data_volume['tooltip'].tolist(),
+    ).add_to(m)
+
+    return folium.Figure().add_child(m).render(), None
@@ -0,0 +1,37 @@
+"""Exporta as projeções (todos os aeroportos x cenários x anos) de uma ou mais bases
+para um único .zip, com um arquivo Parquet, CSV ou Excel por base.
+
+Os dados saem direto dos cubos (ver utils/export.py), em blocos e em fluxo: a memória
+não cresce com o tamanho da exportação. Com --saida - o zip é escrito na saída padrão.
+
+Uso (a partir da raiz do repositório):
+    python src/export_data.py [--bases pax_mercado carga] [--formato parquet|csv|xlsx] [--saida projecoes.zip]
+"""
+import argparse
+import sys
+import time
+
+from utils.data_loader import DATASETS
+from utils.export import FORMATOS, exportar
+
+
+def main():
+    bases = [nome for nome, spec in DATASETS.items() if spec['metrica']]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bases', nargs='+', choices=bases, default=bases,
+                        help='bases exportadas (padrão: todas)')
+    parser.add_argument('--formato', choices=list(FORMATOS), default='parquet')
+    parser.add_argument('--saida', help="arquivo .zip de destino ('-' para a saída padrão)")
+    args = parser.parse_args()
+
+    saida = args.saida or f'projecoes-{args.formato}.zip'
+    inicio = time.perf_counter()
+    if saida == '-':
+        exportar(sys.stdout.buffer, args.bases, args.formato)
+    else:
+        exportar(saida, args.bases, args.formato)
+        print(f'{len(args.bases)} base(s) exportada(s) para {saida} em {time.perf_counter() - inicio:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark de importação do app (python -X importtime).
+
+Executa, em um processo Python novo, as importações de nível de módulo de src/app.py
+(lidas do próprio arquivo) e soma o tempo acumulado das importações de primeiro nível.
+Sai com código 1 quando o total passa do orçamento ou quando algum módulo que deve
+ficar fora da inicialização (ADIADOS) é importado pelo app: diretamente, em um import
+de nível de módulo de app.py, ou indiretamente, por outro módulo (descontado o que o
+próprio Streamlit já importa) - serve como verificação de regressão antes do deploy.
+
+Uso (a partir da raiz do repositório):
+    python src/import_benchmark.py [--orcamento-ms 1500] [--repeticoes 5]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(SRC, 'app.py')
+
+# Orçamento padrão do tempo de importação (ms), com folga sobre o medido no deploy
+ORCAMENTO_MS = 1500
+# Módulos pesados que só podem ser importados quando a seção que os usa é renderizada
+# (ou que não são dependências do app)
+ADIADOS = ['folium', 'plotly.express', 'plotly.graph_objects', 'components.chart', 'components.map',
+           'geopandas', 'sklearn', 'matplotlib', 'openpyxl']
+
+
+def _adiado(modulo):
+    return next((a for a in ADIADOS if modulo == a or modulo.startswith(f'{a}.')), None)
+
+
+def _importacoes():
+    with open(APP, encoding='utf-8') as f:
+        arvore = ast.parse(f.read())
+    return [no for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom))]
+
+
+def importacoes_do_app():
+    """Código com os 'import'/'from ... import' de nível de módulo de app.py."""
+    return '\n'.join(ast.unparse(no) for no in _importacoes())
+
+
+def adiados_no_app():
+    """Módulos de ADIADOS importados diretamente no nível de módulo de app.py."""
+    nomes = set()
+    for no in _importacoes():
+        if isinstance(no, ast.Import):
+            nomes.update(alias.name for alias in no.names)
+        elif no.module:
+            nomes.add(no.module)
+            nomes.update(f'{no.module}.{alias.name}' for alias in no.names)
+    return sorted({a for a in map(_adiado, nomes) if a})
+
+
+def medir(codigo):
+    """Roda as importações com -X importtime. Retorna (total em ms, módulos importados)."""
+    saida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=SRC, capture_output=True, text=True, check=True,
+    ).stderr
+    total_us, modulos = 0, set()
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha.split('|')
+        modulos.add(nome.strip())
+        # Sem recuo = importação de primeiro nível (as demais já estão no acumulado dela)
+        if not nome[1:].startswith(' '):
+            total_us += int(acumulado)
+    return total_us / 1000, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orcamento-ms', type=float, default=ORCAMENTO_MS)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    codigo = importacoes_do_app()
+    medicoes = [medir(codigo) for _ in range(max(1, args.repeticoes))]
+    # O menor tempo é o menos afetado por ruído da máquina
+    total_ms, modulos = min(medicoes, key=lambda m: m[0])
+
+    # O Streamlit já importa parte do plotly (tema dos gráficos): só conta o que vem do app
+    _, do_streamlit = medir('import streamlit')
+    indevidos = {_adiado(m) for m in modulos - do_streamlit} - {None}
+    indevidos.update(adiados_no_app())
+    print(f'Importações de app.py: {total_ms:.0f} ms (menor de {len(medicoes)}; orçamento {args.orcamento_ms:.0f} ms)')
+
+    falhas = []
+    if total_ms > args.orcamento_ms:
+        falhas.append(f'tempo de importação acima do orçamento ({total_ms:.0f} ms > {args.orcamento_ms:.0f} ms)')
+    if indevidos:
+        falhas.append('módulos que deveriam ser adiados: ' + ', '.join(sorted(indevidos)))
+    for falha in falhas:
+        print(f'FALHA: {falha}')
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from components.data import load_base, load_cube
+from utils.aggregates import ANO_ALVO, ANO_BASE, icaos_disponiveis, ranking
+from utils.data_loader import DATASETS
+from utils.formatters import fmt_br_array, fmt_cagr
+from utils.query import serie
+
+# Página de ranking e comparação de aeroportos. Tudo sai do resumo por aeroporto
+# (cube['resumo']) e das séries da camada de consulta (utils/query.py), montados uma
+# vez por base em load_cube.
+st.set_page_config(
+    page_title="Ranking de Aeroportos - Projeção de Demanda",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+CRITERIOS = {
+    f'Projeção {ANO_ALVO}': 'valor_final',
+    f'Taxa Média Anual ({ANO_BASE}–{ANO_ALVO})': 'cagr',
+    f'Crescimento Absoluto ({ANO_BASE}–{ANO_ALVO})': 'crescimento',
+}
+CORES_COMPARACAO = ['#0D6EFD', '#DC3545', '#2CA02C', '#FFD000', '#6F42C1', '#FD7E14', '#20C997', '#6C757D']
+MAX_COMPARACAO = len(CORES_COMPARACAO)
+
+# Bases de projeção (o cadastro de aeroportos não tem métrica)
+bases = {spec['titulo']: nome for nome, spec in DATASETS.items() if spec['metrica']}
+
+st.markdown("## Ranking de Aeroportos")
+
+# --- Sidebar ---
+with st.sidebar:
+    st.markdown("### Configurações do Ranking")
+    dataset = bases[st.selectbox('Base de Projeção', list(bases))]
+    cenario = st.selectbox('Cenário', ['Tendencial', 'Transformador', 'Pessimista'])
+    criterio = st.selectbox('Ordenar por', list(CRITERIOS))
+    top_n = st.slider('Quantidade de aeroportos', min_value=5, max_value=50, value=20, step=5)
+
+spec = DATASETS[dataset]
+cube = load_cube(dataset)
+aeroportos = load_base('aeroportos')
+is_carga = (spec['metrica'] == 'carga_(kg)')
+
+topo = ranking(cube, cenario, CRITERIOS[criterio], top_n)
+
+# --- Tabela do Ranking ---
+if topo.empty:
+    st.info("Nenhum dado de projeção disponível para o ranking.")
+else:
+    tabela = pd.DataFrame({
+        'ICAO': topo.index,
+        'Aeroporto': topo.index.map(aeroportos['NOME_AERO']) if not aeroportos.empty else '',
+        'Cidade/UF': (topo.index.map(aeroportos['Cidade']).astype(str) + '/' + topo.index.map(aeroportos['UF']).astype(str)) if not aeroportos.empty else '',
+        f'Projeção {ANO_BASE}': fmt_br_array(topo['valor_base'].to_numpy(), is_carga),
+        f'Projeção {ANO_ALVO}': fmt_br_array(topo['valor_final'].to_numpy(), is_carga),
+        'Taxa Média Anual': [fmt_cagr(c) for c in topo['cagr']],
+        'Crescimento Absoluto': fmt_br_array(topo['crescimento'].to_numpy(), is_carga, sinal=True),
+        'Ano de Pico': topo['ano_pico'].to_numpy(),
+    })
+    tabela.index = range(1, len(tabela) + 1)
+
+    st.markdown(f"**{spec['titulo']} - Cenário {cenario}:** top {len(tabela)} por {criterio.lower()}")
+    st.dataframe(tabela, use_container_width=True)
+
+# --- Comparação entre Aeroportos ---
+st.markdown("---")
+st.markdown("## Comparação entre Aeroportos")
+
+selecionados = st.multiselect(
+    f'Aeroportos (até {MAX_COMPARACAO})',
+    icaos_disponiveis(cube),
+    default=list(topo.index[:5]),
+    max_selections=MAX_COMPARACAO,
+)
+
+if selecionados:
+    fig = go.Figure()
+    for icao, cor in zip(selecionados, CORES_COMPARACAO):
+        # Série do aeroporto (camada de consulta): arrays por cenário, sem filtrar a base
+        pontos = serie(dataset, icao)
+        vazio = (np.array([]), np.array([]))
+        anos_obs, valores_obs = next((pontos[c] for c in pontos if c.lower() == 'observado'), vazio)
+        anos_proj, valores_proj = pontos.get(cenario, vazio)
+        observado = (anos_obs[anos_obs <= 2024], valores_obs[anos_obs <= 2024])
+        projecao = (anos_proj[anos_proj >= 2025], valores_proj[anos_proj >= 2025])
+        for (anos, valores), tracejado, mostrar in ((observado, 'dot', False), (projecao, 'solid', True)):
+            if not len(anos):
+                continue
+            fig.add_trace(
+                go.Scatter(
+                    x=anos,
+                    y=valores,
+                    mode='lines',
+                    name=icao,
+                    legendgroup=icao,
+                    showlegend=mostrar or not len(projecao[0]),
+                    line=dict(color=cor, width=2, dash=tracejado),
+                    customdata=fmt_br_array(valores, is_carga).tolist(),
+                    hovertemplate=f'<b>{icao}</b><br>Ano: %{{x}}<br>Valor: %{{customdata}}<extra></extra>'
+                )
+            )
+
+    fig.update_layout(
+        xaxis=dict(title='Ano', tickmode='linear', dtick=5, gridcolor='#e0e0e0'),
+        yaxis=dict(title=spec['rotulo_y'], gridcolor='#e0e0e0', tickformat=',.0f'),
+        separators=',.',
+        plot_bgcolor='white', paper_bgcolor='white', font=dict(family="Arial, sans-serif", color='#333', size=12),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        height=500,
+        margin=dict(l=50, r=20, t=20, b=50)
+    )
+    st.markdown(f"Observado (pontilhado) e cenário {cenario} (contínuo)")
+    st.plotly_chart(fig, use_container_width=True)
+else:
+    st.info("Selecione ao menos um aeroporto para comparar.")
@@ -0,0 +1,39 @@
+"""Relatório de inicialização a frio da visão padrão do app: executa src/app.py em um
+processo novo (sem navegador) e mostra quanto tempo a primeira execução levou e quais
+bases/cubos ela precisou carregar. Uma segunda execução mostra o custo já com cache.
+
+Uso (a partir da raiz do repositório):
+    python src/startup_report.py
+"""
+import os
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def main():
+    app = AppTest.from_file(APP, default_timeout=600)
+
+    inicio = time.perf_counter()
+    app.run()
+    fria = time.perf_counter() - inicio
+    if app.exception:
+        raise SystemExit(f'Erro na execução do app: {app.exception[0].message}')
+
+    # O app importa components.data no mesmo processo: os tempos ficam no módulo
+    from components.data import relatorio_carga
+
+    inicio = time.perf_counter()
+    app.run()
+    quente = time.perf_counter() - inicio
+
+    print(f'Primeira execução (a frio): {fria * 1000:.0f} ms')
+    for linha in relatorio_carga() or ['nada carregado']:
+        print(f'  {linha}')
+    print(f'Execução seguinte (com cache): {quente * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
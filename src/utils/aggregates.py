@@ -0,0 +1,278 @@
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import congelar_array, somente_leitura
+
+# Ano usado no mapa e nos cartões quando a base o contém
+ANO_ALVO = 2054
+# Ano inicial do CAGR dos cartões (ANO_BASE -> ANO_ALVO)
+ANO_BASE = 2025
+
+
+def build_cube(df, metrica, aeroportos):
+    """Pré-agrega uma base carregada para que a interação vire consulta em dicionário.
+
+    Retorna um dict com:
+      total    - DataFrame (ano, cenario, metrica) somado para o Total Brasil
+      por_icao - {(cenario, ano): Series icao -> valor}
+      por_uf   - {(cenario, ano): Series UF -> valor}
+      anos     - {cenario: array ordenado dos anos disponíveis}
+      indice   - índice por ICAO (ver build_icao_index)
+      resumo   - {'total': por cenário, 'por_icao': por (cenario, icao)} (ver build_resumo)
+      seletor  - índice UF -> Cidade -> ICAO e busca por prefixo (ver build_seletor)
+    """
+    if df.empty:
+        return {'total': pd.DataFrame(), 'por_icao': {}, 'por_uf': {}, 'anos': {},
+                'indice': build_icao_index(df, metrica), 'metrica': metrica,
+                'resumo': {'total': pd.DataFrame(), 'por_icao': pd.DataFrame()},
+                'seletor': build_seletor(aeroportos)}
+
+    total = df.groupby(['ano', 'cenario'], observed=True)[metrica].sum().reset_index()
+
+    por_icao_serie = df.groupby(['cenario', 'ano', 'icao'], observed=True)[metrica].sum()
+    por_icao = {
+        chave: serie.droplevel(['cenario', 'ano'])
+        for chave, serie in por_icao_serie.groupby(level=['cenario', 'ano'], observed=True)
+    }
+
+    por_uf = {}
+    if not aeroportos.empty:
+        uf_por_icao = aeroportos['UF'].astype(str)
+        por_uf_serie = (
+            por_icao_serie.rename('valor').reset_index()
+            .assign(uf=lambda d: d['icao'].map(uf_por_icao))
+            .dropna(subset=['uf'])
+            .groupby(['cenario', 'ano', 'uf'], observed=True)['valor'].sum()
+        )
+        por_uf = {
+            chave: serie.droplevel(['cenario', 'ano'])
+            for chave, serie in por_uf_serie.groupby(level=['cenario', 'ano'], observed=True)
+        }
+
+    anos = {
+        cenario: grupo.sort_values().unique()
+        for cenario, grupo in total.groupby('cenario', observed=True)['ano']
+    }
+
+    indice = build_icao_index(df, metrica)
+
+    return {
+        'total': somente_leitura(total),
+        'por_icao': {chave: somente_leitura(s) for chave, s in por_icao.items()},
+        'por_uf': {chave: somente_leitura(s) for chave, s in por_uf.items()},
+        'anos': {cenario: congelar_array(a) for cenario, a in anos.items()},
+        'indice': indice,
+        'metrica': metrica,
+        'seletor': build_seletor(aeroportos, indice['posicoes']),
+        'resumo': {
+            'total': somente_leitura(build_resumo(total.pivot(index='cenario', columns='ano', values=metrica))),
+            'por_icao': somente_leitura(build_resumo(por_icao_serie.unstack('ano'))),
+        },
+    }
+
+
+def build_resumo(valores, ano_base=ANO_BASE, ano_final=ANO_ALVO):
+    """Resumo de uma tabela larga (uma linha por série, uma coluna por ano), calculado
+    para todas as linhas de uma vez.
+
+    Colunas: valor_base e valor_final (NaN se o ano não existir), cagr (% a.a.; inf quando
+    parte de zero, NaN quando não se aplica), crescimento (final - base) e ano_pico.
+    """
+    def coluna(ano):
+        if ano in valores.columns:
+            return valores[ano].to_numpy(dtype=float)
+        return np.full(len(valores), np.nan)
+
+    base, final = coluna(ano_base), coluna(ano_final)
+    periodo = ano_final - ano_base
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taxa = ((final / base) ** (1 / periodo if periodo > 0 else 0) - 1) * 100
+    cagr = np.select(
+        [(base > 0) & (final >= 0) & (periodo > 0), (base == 0) & (final > 0), (base == 0) & (final == 0)],
+        [taxa, np.inf, 0.0],
+        np.nan,
+    )
+
+    matriz = valores.to_numpy(dtype=float)
+    pico = valores.columns.to_numpy()[np.where(np.isnan(matriz), -np.inf, matriz).argmax(axis=1)]
+
+    return pd.DataFrame({
+        'valor_base': base,
+        'valor_final': final,
+        'cagr': cagr,
+        'crescimento': final - base,
+        'ano_pico': pico,
+    }, index=valores.index)
+
+
+def build_icao_index(df, metrica):
+    """Ordena a base por (icao, cenario, ano) e guarda, por ICAO, o intervalo [início, fim)
+    das suas linhas nos arrays ano/cenario/valor - a consulta de um aeroporto vira uma
+    busca em dicionário seguida de fatias (views) dos arrays, sem varrer a base."""
+    if df.empty:
+        vazio = np.array([])
+        return {'posicoes': {}, 'ano': vazio, 'cenario': vazio, 'valor': vazio}
+
+    ordenado = df.sort_values(['icao', 'cenario', 'ano'], kind='stable')
+    icaos = ordenado['icao'].to_numpy(dtype=object)
+    inicios = np.concatenate(([0], np.flatnonzero(icaos[1:] != icaos[:-1]) + 1))
+    fins = np.append(inicios[1:], len(icaos))
+    # Cenário como categórico (códigos inteiros): sem objetos Python por linha, o
+    # array pode ser mapeado do artefato em disco (ver utils/cube_cache.py)
+    cenarios = pd.Categorical(ordenado['cenario'].astype(str))
+
+    return {
+        'posicoes': {icaos[i]: (int(i), int(f)) for i, f in zip(inicios, fins)},
+        'ano': congelar_array(ordenado['ano'].to_numpy()),
+        'cenario': pd.Categorical.from_codes(congelar_array(cenarios.codes), dtype=cenarios.dtype),
+        'valor': congelar_array(ordenado[metrica].to_numpy(dtype=float)),
+    }
+
+
+def _normalizar(texto):
+    # Minúsculas e sem acentos, para a busca ignorar 'São'/'sao'
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def build_seletor(aeroportos, icaos=None):
+    """Índice dos seletores da sidebar a partir da tabela de aeroportos (indexada por ICAO),
+    restrito aos ICAOs da base (todos se icaos=None).
+
+    Retorna um dict com:
+      ufs     - lista ordenada de UFs
+      cidades - {uf: lista ordenada de cidades}
+      icaos   - {(uf, cidade): lista ordenada de ICAOs}
+      local   - {icao: (uf, cidade, nome do aeroporto)}
+      busca   - lista ordenada de (termo normalizado, icao): ICAO, nome, cidade e cada
+                palavra deles, para busca por prefixo com bisect
+    """
+    vazio = {'ufs': [], 'cidades': {}, 'icaos': {}, 'local': {}, 'busca': []}
+    if aeroportos.empty:
+        return vazio
+    tabela = aeroportos if icaos is None else aeroportos[aeroportos.index.isin(list(icaos))]
+    tabela = tabela.assign(UF=tabela['UF'].astype(str), Cidade=tabela['Cidade'].astype(str))
+    tabela = tabela.sort_values(['UF', 'Cidade', 'ICAO'])
+
+    seletor = vazio
+    termos = set()
+    for icao, uf, cidade, nome in zip(tabela.index, tabela['UF'], tabela['Cidade'], tabela['NOME_AERO']):
+        if uf not in seletor['cidades']:
+            seletor['ufs'].append(uf)
+            seletor['cidades'][uf] = []
+        if (uf, cidade) not in seletor['icaos']:
+            seletor['cidades'][uf].append(cidade)
+            seletor['icaos'][(uf, cidade)] = []
+        seletor['icaos'][(uf, cidade)].append(icao)
+        nome = '' if pd.isna(nome) else nome
+        seletor['local'][icao] = (uf, cidade, nome)
+        for texto in (icao, nome, cidade):
+            normalizado = _normalizar(texto)
+            termos.update((termo, icao) for termo in [normalizado, *normalizado.split()] if termo)
+    seletor['busca'] = sorted(termos)
+    return seletor
+
+
+# --- API de Consulta (usada pelo gráfico, cartões e mapa) ---
+def resolve_cenario(cube, cenario):
+    """Nome do cenário como está na base (comparação sem diferenciar maiúsculas)."""
+    for nome in cube['anos']:
+        if str(nome).strip().lower() == cenario.strip().lower():
+            return nome
+    return None
+
+
+def snapshot(cube, cenario, ano=ANO_ALVO, nivel='por_icao'):
+    """Valores por ICAO (ou UF) de um cenário em um ano.
+
+    Se o ano pedido não existir no cenário, usa o maior ano disponível.
+    Retorna (ano_usado, Series) ou (None, Series vazia).
+    """
+    nome = resolve_cenario(cube, cenario)
+    if nome is None:
+        return None, pd.Series(dtype=float)
+    anos = cube['anos'][nome]
+    ano_usado = ano if ano in anos else int(anos.max())
+    return ano_usado, cube[nivel].get((nome, ano_usado), pd.Series(dtype=float))
+
+
+def resumo(cube, icao=None):
+    """Resumo por cenário (ver build_resumo) do Total Brasil (icao=None) ou de um aeroporto."""
+    if icao is None:
+        return cube['resumo']['total']
+    tabela = cube['resumo']['por_icao']
+    if tabela.empty or icao not in cube['indice']['posicoes']:
+        return pd.DataFrame()
+    return tabela.xs(icao, level='icao')
+
+
+def ranking(cube, cenario, criterio='valor_final', n=20):
+    """Top-n aeroportos de um cenário por uma coluna do resumo, em ordem decrescente.
+
+    Usa argpartition sobre a coluna já calculada (sem ordenar a tabela inteira); empates
+    seguem a ordem alfabética do ICAO e valores NaN ficam de fora.
+    """
+    tabela = cube['resumo']['por_icao']
+    nome = resolve_cenario(cube, cenario)
+    if tabela.empty or nome is None:
+        return pd.DataFrame()
+    do_cenario = tabela.xs(nome, level='cenario')
+    valores = do_cenario[criterio].to_numpy(dtype=float)
+    validos = np.flatnonzero(~np.isnan(valores))
+    n = min(n, len(validos))
+    if n <= 0:
+        return do_cenario.iloc[:0]
+    topo = validos[np.argpartition(-valores[validos], n - 1)[:n]]
+    topo = topo[np.lexsort((topo, -valores[topo]))]
+    return do_cenario.iloc[topo]
+
+
+def buscar_aeroportos(cube, texto, limite=20):
+    """ICAOs cujo código, nome ou cidade (ou uma de suas palavras) começa com o texto."""
+    prefixo = _normalizar(texto).strip()
+    if not prefixo:
+        return []
+    busca = cube['seletor']['busca']
+    encontrados = []
+    for termo, icao in busca[bisect_left(busca, (prefixo,)):]:
+        if not termo.startswith(prefixo) or len(encontrados) >= limite:
+            break
+        if icao not in encontrados:
+            encontrados.append(icao)
+    return sorted(encontrados)
+
+
+def icaos_disponiveis(cube):
+    """ICAOs presentes na base, em ordem alfabética."""
+    return list(cube['indice']['posicoes'])
+
+
+def tem_dados(cube):
+    """False quando a base veio vazia (CSV sem linhas ou falha na carga)."""
+    return not cube['total'].empty
+
+
+def tem_icao(cube, icao):
+    return icao in cube['indice']['posicoes']
+
+
+def serie(cube, icao=None):
+    """Série (ano, cenario, valor) do Total Brasil (icao=None) ou de um aeroporto.
+
+    Sempre devolve um DataFrame novo sobre arrays somente leitura do cubo: o chamador
+    pode reatribuir colunas sem afetar o cache compartilhado, e nada é copiado.
+    """
+    if icao is None:
+        return cube['total'].copy(deep=False)
+    indice = cube['indice']
+    if icao not in indice['posicoes']:
+        return pd.DataFrame()
+    inicio, fim = indice['posicoes'][icao]
+    return pd.DataFrame({
+        'ano': indice['ano'][inicio:fim],
+        'cenario': indice['cenario'][inicio:fim],
+        cube['metrica']: indice['valor'][inicio:fim],
+    }, copy=False)
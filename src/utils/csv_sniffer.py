@@ -0,0 +1,98 @@
+import json
+import os
+
+from utils.parquet_cache import CACHE_DIR
+
+# Resultado da detecção por arquivo, invalidado quando mtime/tamanho mudam
+DIALETOS_PATH = os.path.join(CACHE_DIR, 'dialetos.json')
+
+AMOSTRA_BYTES = 64 * 1024
+LINHAS_AMOSTRA = 50
+# Ordem de preferência quando mais de um delimitador é consistente; ',' por último
+# porque é também o separador decimal das bases
+DELIMITADORES = [';', '\t', '|', ',']
+SEP_PADRAO = ';'
+ENCODING_PADRAO = 'latin-1'
+
+_memoria = {}
+
+
+def _assinatura(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _detectar_encoding(amostra, completa):
+    if amostra.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    try:
+        amostra.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Amostra truncada no meio de um caractere multibyte ainda é UTF-8
+        if completa or e.start < len(amostra) - 3:
+            return ENCODING_PADRAO
+    return 'utf-8'
+
+
+def _detectar_sep(texto):
+    linhas = [l for l in texto.splitlines() if l.strip()][:LINHAS_AMOSTRA]
+    if len(linhas) > 1:
+        # Descarta a última linha, que pode ter sido cortada pela amostra
+        linhas = linhas[:-1]
+    for sep in DELIMITADORES:
+        contagens = {linha.count(sep) for linha in linhas}
+        if len(contagens) == 1 and contagens.pop() > 0:
+            return sep
+    return SEP_PADRAO
+
+
+def _ler_registro():
+    try:
+        with open(DIALETOS_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar(path, dialeto):
+    _memoria[path] = dialeto
+    registro = _ler_registro()
+    registro[path] = dialeto
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f'{DIALETOS_PATH}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(registro, f, indent=1)
+        os.replace(tmp, DIALETOS_PATH)
+    except OSError:
+        # Sem escrita em disco o resultado fica só em memória
+        pass
+
+
+def detect_dialect(path):
+    """Delimitador e encoding do CSV, lendo só os primeiros AMOSTRA_BYTES uma única vez.
+
+    O resultado é guardado (em memória e em DIALETOS_PATH) com o mtime/tamanho do
+    arquivo e reaproveitado até o arquivo mudar. Retorna {'sep': ..., 'encoding': ...}.
+    """
+    assinatura = _assinatura(path)
+    for fonte in (_memoria, _ler_registro()):
+        dialeto = fonte.get(path)
+        if dialeto and dialeto['assinatura'] == assinatura:
+            _memoria[path] = dialeto
+            return dialeto
+
+    with open(path, 'rb') as f:
+        amostra = f.read(AMOSTRA_BYTES)
+    encoding = _detectar_encoding(amostra, completa=len(amostra) < AMOSTRA_BYTES)
+    texto = amostra.decode(encoding, errors='replace')
+    dialeto = {'sep': _detectar_sep(texto), 'encoding': encoding, 'assinatura': assinatura}
+    _gravar(path, dialeto)
+    return dialeto
+
+
+def corrigir_encoding(path, encoding=ENCODING_PADRAO):
+    """Registra outro encoding para o arquivo (ex.: byte inválido além da amostra)."""
+    dialeto = dict(detect_dialect(path), encoding=encoding)
+    _gravar(path, dialeto)
+    return dialeto
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import build_cube
+from utils.data_loader import DATASETS, congelar_array, load_dataset, somente_leitura, spec_version
+from utils.parquet_cache import CACHE_DIR, _remove_stale, cache_key
+
+# Versão do conteúdo do cubo: incrementar quando build_cube (ou o formato abaixo)
+# mudar, para que os artefatos já gerados sejam refeitos
+CUBO_VERSAO = 3
+
+# --- Formato do Artefato ---
+# Um único arquivo por cubo: cabeçalho | manifesto JSON | arrays NumPy.
+# O manifesto descreve a estrutura do cubo (dicts, listas, tuplas, DataFrames, Series,
+# índices e Categoricals) e aponta para os arrays numéricos, gravados crus (dtype,
+# tamanho e posição no manifesto) e alinhados. Os textos (ICAOs, UFs, cenários) ficam
+# em uma tabela única no manifesto e os índices de texto guardam só os códigos.
+# Na leitura os arrays são views somente leitura de um mmap: todos os processos do
+# Streamlit e da API mapeiam o mesmo arquivo e os dados ficam uma única vez no page
+# cache. Nada é desserializado como objeto Python arbitrário (sem pickle): o arquivo
+# só pode conter dados, e não depende do layout interno da versão do pandas que o gravou.
+MAGICO = b'CUBOJSON'
+_CABECALHO = struct.Struct('<8sQ')
+ALINHAMENTO = 64
+# Tipos numéricos aceitos nos arrays (bool, inteiros e ponto flutuante)
+_TIPOS_ARRAY = 'biuf'
+_ESCALARES = (str, bool, int, float, type(None))
+
+
+def cube_key(nome):
+    """Chave do cubo: versões (hash + declaração) da base e da tabela de aeroportos."""
+    fontes = [cache_key(DATASETS[n]['arquivo'], spec_version(n)) for n in (nome, 'aeroportos')]
+    return hashlib.sha256(':'.join([*fontes, str(CUBO_VERSAO)]).encode()).hexdigest()
+
+
+def cube_path(nome, digest):
+    """Caminho do cubo serializado correspondente a uma versão da base."""
+    return os.path.join(CACHE_DIR, f'{nome}-cubo-{digest[:16]}.mmap')
+
+
+def _alinhar(n):
+    return -(-n // ALINHAMENTO) * ALINHAMENTO
+
+
+def _congelar(obj):
+    # Garante o somente leitura em todo o cubo; os arrays que vêm do mmap já são
+    # somente leitura e são mantidos sem cópia
+    if isinstance(obj, dict):
+        return {chave: _congelar(valor) for chave, valor in obj.items()}
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return somente_leitura(obj)
+    if isinstance(obj, np.ndarray):
+        return congelar_array(obj)
+    return obj
+
+
+# --- Gravação ---
+class _Gravacao:
+    """Acumula os arrays e a tabela de textos enquanto a estrutura é convertida."""
+
+    def __init__(self):
+        self.arrays = []
+        self.tabela = {}
+        self._gravados = {}
+
+    def array(self, valores):
+        valores = np.ascontiguousarray(valores)
+        if valores.dtype.kind not in _TIPOS_ARRAY:
+            raise TypeError(f'array de tipo não suportado no cubo: {valores.dtype}')
+        # Arrays iguais (ex.: os ICAOs de cada (cenário, ano)) são gravados uma vez
+        chave = (valores.dtype.str, valores.tobytes())
+        if chave not in self._gravados:
+            self._gravados[chave] = len(self.arrays)
+            self.arrays.append(valores)
+        return {'t': 'array', 'i': self._gravados[chave]}
+
+    def textos(self, valores, dtype):
+        codigos = []
+        for valor in valores:
+            if not isinstance(valor, str):
+                raise TypeError(f'valor não textual em coluna de texto do cubo: {valor!r}')
+            codigos.append(self.tabela.setdefault(valor, len(self.tabela)))
+        return {'t': 'textos', 'codigos': self.array(np.array(codigos, dtype=np.int32)), 'dtype': str(dtype)}
+
+    def valores(self, valores):
+        # Coluna/índice: Categorical, texto ou array numérico
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            categorico = pd.Categorical(valores)
+            return {'t': 'categorico', 'codigos': self.array(categorico.codes),
+                    'categorias': self.indice(categorico.categories), 'ordenado': bool(categorico.ordered)}
+        if valores.dtype.kind in _TIPOS_ARRAY:
+            return self.array(np.asarray(valores))
+        return self.textos(np.asarray(valores, dtype=object), valores.dtype)
+
+    def indice(self, indice):
+        if isinstance(indice, pd.RangeIndex):
+            return {'t': 'range', 'inicio': indice.start, 'fim': indice.stop, 'passo': indice.step, 'nome': indice.name}
+        if isinstance(indice, pd.MultiIndex):
+            return {'t': 'multiindice', 'niveis': [self.indice(nivel) for nivel in indice.levels],
+                    'codigos': [self.array(codigos) for codigos in indice.codes], 'nomes': list(indice.names)}
+        return {'t': 'indice', 'valores': self.valores(indice), 'nome': indice.name}
+
+    def lista(self, itens):
+        # Listas de escalares ou de tuplas de escalares (seletor, posições) vão inteiras
+        if all(isinstance(v, _ESCALARES) for v in itens):
+            return {'t': 'escalares', 'v': [v.item() if isinstance(v, np.generic) else v for v in itens]}
+        if all(isinstance(v, tuple) and all(isinstance(x, _ESCALARES) for x in v) for v in itens):
+            return {'t': 'tuplas', 'v': [[x.item() if isinstance(x, np.generic) else x for x in v] for v in itens]}
+        return {'t': 'lista', 'v': [self.no(v) for v in itens]}
+
+    def no(self, obj):
+        if isinstance(obj, dict):
+            return {'t': 'dict', 'chaves': self.lista(list(obj)), 'valores': self.lista(list(obj.values()))}
+        if isinstance(obj, pd.DataFrame):
+            return {'t': 'dataframe', 'colunas': [self.no(c) for c in obj.columns],
+                    'valores': [self.valores(obj[c]) for c in obj.columns], 'indice': self.indice(obj.index)}
+        if isinstance(obj, pd.Series):
+            return {'t': 'series', 'valores': self.valores(obj), 'indice': self.indice(obj.index), 'nome': self.no(obj.name)}
+        if isinstance(obj, pd.Categorical):
+            return self.valores(obj)
+        if isinstance(obj, np.ndarray):
+            return self.array(obj)
+        if isinstance(obj, tuple):
+            return {'t': 'tupla', 'v': [self.no(v) for v in obj]}
+        if isinstance(obj, list):
+            return self.lista(obj)
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if obj is None or isinstance(obj, (str, bool, int, float)):
+            return obj
+        raise TypeError(f'tipo não suportado no cubo: {type(obj).__name__}')
+
+
+def write_cube(cube, target):
+    """Grava o cubo de forma atômica (arquivo temporário + rename)."""
+    gravacao = _Gravacao()
+    estrutura = gravacao.no(cube)
+
+    posicoes, inicio = [], 0
+    for valores in gravacao.arrays:
+        posicoes.append([valores.dtype.str, len(valores), inicio])
+        inicio = _alinhar(inicio + valores.nbytes)
+    manifesto = json.dumps({'estrutura': estrutura, 'textos': list(gravacao.tabela), 'arrays': posicoes},
+                           ensure_ascii=False, separators=(',', ':')).encode()
+    base = _alinhar(_CABECALHO.size + len(manifesto))
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_CABECALHO.pack(MAGICO, len(manifesto)))
+        f.write(manifesto)
+        for valores, (_, _, deslocamento) in zip(gravacao.arrays, posicoes):
+            f.seek(base + deslocamento)
+            f.write(valores.tobytes())
+    os.replace(tmp, target)
+
+
+# --- Leitura ---
+class _Leitura:
+    """Reconstrói a estrutura do manifesto sobre os arrays mapeados."""
+
+    def __init__(self, manifesto, visao, base):
+        self.tabela = np.array(manifesto['textos'], dtype=object)
+        self.arrays = []
+        for tipo, tamanho, deslocamento in manifesto['arrays']:
+            dtype = np.dtype(tipo)
+            if dtype.kind not in _TIPOS_ARRAY:
+                raise ValueError(f'array de tipo não suportado no cubo: {tipo}')
+            self.arrays.append(np.frombuffer(visao, dtype=dtype, count=tamanho, offset=base + deslocamento))
+        # Índices iguais (mesmos códigos) são reconstruídos uma vez e compartilhados
+        self._indices = {}
+
+    def valores(self, no):
+        if no['t'] == 'array':
+            return self.arrays[no['i']]
+        if no['t'] == 'textos':
+            valores = self.tabela[self.valores(no['codigos'])]
+            # dtype 'str' do pandas (ou object) como foi gravado
+            return valores if no['dtype'] == 'object' else pd.array(valores, dtype=no['dtype'])
+        categorias = self.indice(no['categorias'])
+        return pd.Categorical.from_codes(self.valores(no['codigos']),
+                                         dtype=pd.CategoricalDtype(categorias, ordered=no['ordenado']))
+
+    def indice(self, no):
+        if no['t'] == 'range':
+            return pd.RangeIndex(no['inicio'], no['fim'], no['passo'], name=no['nome'])
+        if no['t'] == 'multiindice':
+            return pd.MultiIndex(levels=[self.indice(nivel) for nivel in no['niveis']],
+                                 codes=[self.valores(c) for c in no['codigos']],
+                                 names=no['nomes'], verify_integrity=False)
+        chave = json.dumps(no, sort_keys=True)
+        if chave not in self._indices:
+            valores = self.valores(no['valores'])
+            if isinstance(valores, pd.Categorical):
+                self._indices[chave] = pd.CategoricalIndex(valores, name=no['nome'])
+            else:
+                self._indices[chave] = pd.Index(valores, name=no['nome'], copy=False)
+        return self._indices[chave]
+
+    def no(self, no):
+        if not isinstance(no, dict):
+            return no
+        tipo = no['t']
+        if tipo == 'dict':
+            return dict(zip(self.no(no['chaves']), self.no(no['valores'])))
+        if tipo == 'escalares':
+            return no['v']
+        if tipo == 'tuplas':
+            return list(map(tuple, no['v']))
+        if tipo == 'lista':
+            return [self.no(v) for v in no['v']]
+        if tipo == 'tupla':
+            return tuple(self.no(v) for v in no['v'])
+        if tipo == 'dataframe':
+            colunas = {self.no(c): self.valores(v) for c, v in zip(no['colunas'], no['valores'])}
+            return pd.DataFrame(colunas, index=self.indice(no['indice']), copy=False)
+        if tipo == 'series':
+            return pd.Series(self.valores(no['valores']), index=self.indice(no['indice']),
+                             name=self.no(no['nome']), copy=False)
+        if tipo in ('array', 'textos', 'categorico'):
+            return self.valores(no)
+        raise ValueError(f'nó desconhecido no manifesto do cubo: {tipo}')
+
+
+def map_cube(path):
+    """Mapeia o artefato (somente leitura) e reconstrói o cubo sobre o mapeamento."""
+    with open(path, 'rb') as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magico, tamanho = _CABECALHO.unpack_from(mapa, 0)
+    if magico != MAGICO:
+        raise ValueError(f'{path}: artefato de cubo inválido')
+    manifesto = json.loads(mapa[_CABECALHO.size:_CABECALHO.size + tamanho])
+    # Os arrays mantêm referência ao mmap, que fica aberto enquanto o cubo existir
+    leitura = _Leitura(manifesto, memoryview(mapa), _alinhar(_CABECALHO.size + tamanho))
+    return leitura.no(manifesto['estrutura'])
+
+
+def read_cube(nome, builder):
+    """Lê o cubo pré-agregado da base; só chama builder() quando alguma fonte mudou."""
+    target = cube_path(nome, cube_key(nome))
+    if os.path.exists(target):
+        try:
+            return _congelar(map_cube(target))
+        except Exception:
+            # Artefato corrompido ou de outra versão das bibliotecas: refaz
+            pass
+
+    cube = builder()
+    try:
+        write_cube(cube, target)
+        _remove_stale(nome, target)
+    except Exception:
+        # Sem permissão de escrita o cubo fica só em memória
+        pass
+    return cube
+
+
+def build_cube_artifact(nome):
+    """Gera (ou confirma) o cubo serializado da base. Retorna (arquivo, reconstruido)."""
+    target = cube_path(nome, cube_key(nome))
+    if os.path.exists(target):
+        return target, False
+    cube = build_cube(load_dataset(nome), DATASETS[nome]['metrica'], load_dataset('aeroportos'))
+    write_cube(cube, target)
+    _remove_stale(nome, target)
+    return target, True
@@ -1,29 +1,333 @@
+import hashlib
+import logging
+import os
+from functools import partial
+
+import numpy as np
 import pandas as pd
 
-def load_excel_data(file_path):
-    """Load data from an Excel file."""
-    return pd.read_excel(file_path)
+from utils.csv_sniffer import corrigir_encoding, detect_dialect
+from utils.parquet_cache import read_cached
+
+logger = logging.getLogger(__name__)
+
+# --- Caminhos dos Dados ---
+CSV_AISWEB = os.path.join('src', 'data', 'AISWEB_Aeroportos.csv')
+CSV_PAX_MERCADO = os.path.join('src', 'data', 'projecoes_por_aeroporto.csv')
+CSV_PAX_PAN = os.path.join('src', 'data', 'base_final_PAN_cenarios.csv')
+CSV_CARGA = os.path.join('src', 'data', 'Painel_Carga.csv')
+CSV_PAX_INTERNACIONAL = os.path.join('src', 'data', 'Passageiros_Internacionais.csv')
+CSV_CARGA_INTERNACIONAL = os.path.join('src', 'data', 'Carga_internacional.csv')
+CSV_MOV_AERONAVES = os.path.join('src', 'data', 'Mov_Aeronaves_dom_PAN.csv')
+
+# --- Registro de Bases ---
+# Cada entrada declara como ler e limpar um CSV:
+#   arquivo   - caminho do CSV de origem
+#   colunas   - posição da coluna no arquivo -> nome no DataFrame (só essas são lidas)
+#   tipos     - dtype explícito por coluna ('category' para as de baixa cardinalidade)
+#   metrica   - coluna de valor (formato BR, convertida para float); None nas tabelas
+#               de referência, que declaram a 'chave' (índice único) e cujos tipos
+#               numéricos (ex.: 'float32') são lidos do formato BR uma única vez
+#   filtros   - coluna -> valor exigido, aplicado após a normalização
+#   agregar   - soma a métrica por (icao, cenario, ano), eliminando as demais quebras
+#   streaming - força a leitura em blocos (ver parse_dataset)
+#   sep / encoding - opcionais; por padrão são detectados (utils/csv_sniffer.py)
+#   titulo / rotulo_y / tipo - textos usados no gráfico, nos títulos e no mapa do app
+# Para incluir uma nova base de projeção basta acrescentar uma entrada aqui.
+DATASETS = {
+    'aeroportos': {
+        'arquivo': CSV_AISWEB,
+        'colunas': {1: 'ICAO', 2: 'NOME_AERO', 3: 'lon', 4: 'lat', 5: 'UF', 6: 'Cidade'},
+        'tipos': {'UF': 'category', 'Cidade': 'category', 'lat': 'float32', 'lon': 'float32'},
+        'metrica': None,
+        'chave': 'ICAO',
+    },
+    'pax_mercado': {
+        'arquivo': CSV_PAX_MERCADO,
+        'colunas': {0: 'icao', 1: 'ano', 2: 'total_movimento', 3: 'cenario'},
+        'tipos': {'cenario': 'category'},
+        'metrica': 'total_movimento',
+        'titulo': 'Passageiros Domésticos - Mercado (Rede Atual)',
+        'rotulo_y': 'Passageiros',
+        'tipo': 'Passageiros',
+    },
+    'pax_pan_domestico': {
+        'arquivo': CSV_PAX_PAN,
+        'colunas': {0: 'cenario', 1: 'natureza', 2: 'icao', 3: 'sentido', 4: 'ano', 5: 'passageiros'},
+        'tipos': {'cenario': 'category', 'natureza': 'category', 'sentido': 'category'},
+        'metrica': 'passageiros',
+        'filtros': {'natureza': 'domestico'},
+        'titulo': 'Passageiros Domésticos (PAN)',
+        'rotulo_y': 'Passageiros',
+        'tipo': 'Passageiros',
+    },
+    'pax_internacional': {
+        'arquivo': CSV_PAX_INTERNACIONAL,
+        'colunas': {0: 'icao', 1: 'ano', 2: 'cenario', 5: 'passageiros'},
+        'tipos': {'cenario': 'category'},
+        'metrica': 'passageiros',
+        'agregar': True,
+        'titulo': 'Passageiros Internacionais',
+        'rotulo_y': 'Passageiros',
+        'tipo': 'Passageiros',
+    },
+    'carga': {
+        'arquivo': CSV_CARGA,
+        'colunas': {0: 'icao', 1: 'cenario', 2: 'ano', 3: 'carga_(kg)'},
+        'tipos': {'cenario': 'category'},
+        'metrica': 'carga_(kg)',
+        'titulo': 'Carga Doméstica',
+        'rotulo_y': 'Carga Doméstica (kg)',
+        'tipo': 'Carga',
+    },
+    'carga_internacional': {
+        'arquivo': CSV_CARGA_INTERNACIONAL,
+        'colunas': {0: 'icao', 2: 'cenario', 3: 'ano', 4: 'carga_(kg)'},
+        'tipos': {'cenario': 'category'},
+        'metrica': 'carga_(kg)',
+        # Soma Exportação + Importação
+        'agregar': True,
+        'titulo': 'Carga Internacional',
+        'rotulo_y': 'Carga Internacional (kg)',
+        'tipo': 'Carga',
+    },
+    'mov_aeronaves_pan_domestico': {
+        'arquivo': CSV_MOV_AERONAVES,
+        'colunas': {0: 'cenario', 1: 'natureza', 2: 'icao', 3: 'ano', 4: 'movimentacao'},
+        'tipos': {'cenario': 'category', 'natureza': 'category'},
+        'metrica': 'movimentacao',
+        'filtros': {'natureza': 'domestico'},
+        'titulo': 'Movimentação de Aeronaves (PAN)',
+        'rotulo_y': 'Movimentação de Aeronaves',
+        'tipo': 'Movimentação de Aeronaves',
+    },
+}
+
+# Leitura em blocos (streaming) para arquivos de projeção grandes, ex.: quebras
+# origem-destino. Abaixo do limite, o CSV inteiro é lido de uma vez.
+LIMITE_STREAMING_BYTES = 64 * 1024 ** 2
+BLOCO_STREAMING_LINHAS = 200_000
+PARCIAIS_MAX = 8
+
+
+# --- Conversão de Números no Formato BR ---
+# A métrica é convertida já na leitura (read_csv com decimal=',' e thousands='.'),
+# sem Series intermediárias. Só quando algum valor não é numérico a coluna chega
+# como texto e cai no caminho de uma passada (translate + to_numeric) abaixo.
+LEITURA_NUMERICA_BR = {'decimal': ',', 'thousands': '.'}
+_TRADUCAO_BR = str.maketrans({'.': None, ',': '.'})
+
+
+def parse_br_numeric(series):
+    """Converte uma Series no formato BR ('1.234.567,89') para float64.
+
+    Retorna (valores, falhas): valores vazios ou inválidos viram 0 e são contados em falhas.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        valores = series.astype('float64')
+    else:
+        valores = pd.to_numeric(series.astype(str).str.translate(_TRADUCAO_BR), errors='coerce')
+    invalidos = valores.isna()
+    falhas = int(invalidos.sum())
+    if falhas:
+        valores = valores.mask(invalidos, 0.0)
+    return valores, falhas
+
+
+def clean_numeric_series(series):
+    """Limpa e converte uma Series Pandas de string com formato BR para float."""
+    return parse_br_numeric(series)[0]
+
+
+# --- Saídas Somente Leitura ---
+# As bases e agregados são compartilhados entre sessões (st.cache_resource), então
+# as colunas numéricas ficam apoiadas em arrays NumPy não graváveis: uma escrita
+# acidental (df.loc[...] = ...) falha em vez de alterar os dados de todos.
+def congelar_array(arr):
+    arr = np.asarray(arr)
+    if arr.flags.writeable:
+        arr = arr.copy()
+        arr.flags.writeable = False
+    return arr
+
+
+def _numerica_numpy(series):
+    return isinstance(series.dtype, np.dtype) and np.issubdtype(series.dtype, np.number)
+
+
+def somente_leitura(obj):
+    """Versão somente leitura de um DataFrame/Series (colunas numéricas congeladas)."""
+    if isinstance(obj, pd.Series):
+        if not _numerica_numpy(obj):
+            return obj
+        return pd.Series(congelar_array(obj.to_numpy()), index=obj.index, name=obj.name, copy=False)
+    colunas = {
+        c: congelar_array(obj[c].to_numpy()) if _numerica_numpy(obj[c]) else obj[c]
+        for c in obj.columns
+    }
+    return pd.DataFrame(colunas, index=obj.index, copy=False)
+
+
+# --- Motor de Carregamento ---
+def _read_csv(spec, path, **kwargs):
+    # Delimitador/encoding detectados uma vez por versão do arquivo; o parse é
+    # sempre feito com o engine C
+    dialeto = detect_dialect(path)
+    return pd.read_csv(
+        path,
+        sep=spec.get('sep', dialeto['sep']),
+        encoding=spec.get('encoding', dialeto['encoding']),
+        engine='c',
+        **kwargs,
+    )
+
+
+def _limpar_bloco(df, spec):
+    """Normaliza chaves, converte a métrica e aplica filtros em um bloco já lido.
+
+    Retorna (bloco limpo, quantidade de valores da métrica convertidos para 0).
+    """
+    tipos = spec.get('tipos', {})
+    metrica = spec['metrica']
+
+    df['icao'] = df['icao'].astype(str).str.upper().str.strip()
+    df['ano'] = pd.to_numeric(df['ano'], errors='coerce')
+    for coluna, tipo in tipos.items():
+        if tipo == 'category':
+            valores = df[coluna].astype(str).str.strip()
+            if coluna in spec.get('filtros', {}):
+                valores = valores.str.lower()
+            df[coluna] = valores.astype('category')
+    df[metrica], falhas = parse_br_numeric(df[metrica])
+
+    for coluna, valor in spec.get('filtros', {}).items():
+        df = df[df[coluna] == valor]
+
+    return df.dropna(subset=['icao', 'ano', 'cenario']), falhas
+
+
+def _limpar_referencia(df, spec):
+    """Tabela de referência (sem métrica): chave normalizada e única como índice e
+    colunas numéricas no formato BR convertidas (NaN quando inválidas)."""
+    chave = spec['chave']
+    df[chave] = df[chave].astype(str).str.upper().str.strip()
+    for coluna, tipo in spec.get('tipos', {}).items():
+        if tipo == 'category':
+            df[coluna] = df[coluna].astype(str).str.strip().astype('category')
+        else:
+            # Coordenadas não têm separador de milhar: só a vírgula decimal é trocada
+            texto = df[coluna].astype(str).str.replace(',', '.', regex=False)
+            df[coluna] = pd.to_numeric(texto, errors='coerce').astype(tipo)
+    return df.drop_duplicates(chave).set_index(chave)
+
+
+def _agregar(df, metrica):
+    return df.groupby(['icao', 'cenario', 'ano'], as_index=False, observed=True)[metrica].sum()
+
+
+def _concatenar(blocos, spec):
+    # Blocos lidos separadamente têm categorias diferentes: refaz o dtype no resultado
+    df = pd.concat(blocos, ignore_index=True)
+    for coluna, tipo in spec.get('tipos', {}).items():
+        if tipo == 'category' and coluna in df.columns:
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+def _parse_streaming(leitor, spec):
+    """Consome o CSV em blocos de tamanho fixo, limpando e somando cada bloco.
+
+    Com 'agregar', os parciais são recombinados a cada PARCIAIS_MAX blocos, de modo
+    que a memória de pico acompanha o tamanho do cubo (icao x cenario x ano) e não
+    o do arquivo.
+    """
+    metrica = spec['metrica']
+    parciais = []
+    falhas = 0
+    for bloco in leitor:
+        bloco.columns = [spec['colunas'][pos] for pos in sorted(spec['colunas'])]
+        limpo, falhas_bloco = _limpar_bloco(bloco, spec)
+        falhas += falhas_bloco
+        parciais.append(_agregar(limpo, metrica) if spec.get('agregar') else limpo)
+        if spec.get('agregar') and len(parciais) >= PARCIAIS_MAX:
+            parciais = [_agregar(_concatenar(parciais, spec), metrica)]
+
+    if not parciais:
+        return pd.DataFrame(columns=[spec['colunas'][pos] for pos in sorted(spec['colunas'])]), falhas
+    df = _concatenar(parciais, spec)
+    return (_agregar(df, metrica) if spec.get('agregar') else df), falhas
+
+
+def _ler(spec, path, leitura, chunksize):
+    colunas = spec['colunas']
+    metrica = spec.get('metrica')
+    if chunksize:
+        with _read_csv(spec, path, chunksize=chunksize, **leitura) as leitor:
+            return _parse_streaming(leitor, spec)
+
+    df = _read_csv(spec, path, **leitura)
+    df.columns = [colunas[pos] for pos in sorted(colunas)]
+    if metrica is None:
+        return _limpar_referencia(df, spec), 0
+    df, falhas = _limpar_bloco(df, spec)
+    if spec.get('agregar'):
+        df = _agregar(df, metrica)
+    return df, falhas
+
+
+def parse_dataset(nome, path=None, chunksize=None):
+    """Lê e limpa uma base do registro, lendo só as colunas declaradas e com dtypes explícitos.
+
+    Arquivos a partir de LIMITE_STREAMING_BYTES (ou com 'streaming' no registro, ou
+    com chunksize informado) são processados em blocos de chunksize linhas.
+    """
+    spec = DATASETS[nome]
+    colunas = spec['colunas']
+    tipos = spec.get('tipos', {})
+    metrica = spec.get('metrica')
+    path = path or spec['arquivo']
+
+    posicoes = sorted(colunas)
+    leitura = {
+        'usecols': posicoes,
+        'dtype': {pos: tipos[colunas[pos]] for pos in posicoes if tipos.get(colunas[pos]) == 'category'},
+    }
+    if metrica:
+        leitura.update(LEITURA_NUMERICA_BR)
+
+    if chunksize is None and metrica and (spec.get('streaming') or os.path.getsize(path) >= LIMITE_STREAMING_BYTES):
+        chunksize = BLOCO_STREAMING_LINHAS
+
+    try:
+        df, falhas = _ler(spec, path, leitura, chunksize)
+    except UnicodeDecodeError:
+        # Byte fora do UTF-8 depois da amostra usada na detecção: relê em latin-1
+        corrigir_encoding(path)
+        df, falhas = _ler(spec, path, leitura, chunksize)
+    if metrica is None:
+        return df
+
+    if falhas:
+        logger.warning("%s: %d valor(es) de '%s' vazios ou inválidos convertidos para 0", nome, falhas, metrica)
+
+    if spec.get('agregar'):
+        df = df.sort_values(['icao', 'cenario', 'ano'])
 
-def load_csv_data(file_path):
-    """Load data from a CSV file."""
-    return pd.read_csv(file_path)
+    return df.reset_index(drop=True)
 
-def load_airport_data(airport_file):
-    """Load airport data including city and state information."""
-    return load_csv_data(airport_file)
 
-def load_projection_data(projection_file):
-    """Load market projection data for airports."""
-    return load_excel_data(projection_file)
+def spec_version(nome):
+    """Hash da declaração da base e do dialeto do CSV: muda o cache quando algum deles muda."""
+    spec = DATASETS[nome]
+    dialeto = detect_dialect(spec['arquivo'])
+    chave = (sorted(spec.items()), dialeto['sep'], dialeto['encoding'])
+    return hashlib.sha256(repr(chave).encode()).hexdigest()
 
-def load_carga_data(carga_file):
-    """Load air cargo market projection data."""
-    return load_excel_data(carga_file)
 
-def load_international_passengers_data(international_file):
-    """Load international passengers projection data."""
-    return load_excel_data(international_file)
+def load_dataset(nome):
+    """Carrega uma base do registro a partir do cache colunar (ou do CSV, se mudou).
 
-def load_demand_projection_data(demand_file):
-    """Load demand projection results."""
-    return load_csv_data(demand_file)
\ No newline at end of file
+    O resultado é somente leitura e pode ser compartilhado entre sessões sem cópia.
+    """
+    spec = DATASETS[nome]
+    return somente_leitura(read_cached(nome, spec['arquivo'], partial(parse_dataset, nome), spec_version(nome)))
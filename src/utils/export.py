@@ -0,0 +1,172 @@
+import glob
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cube_cache import cube_key
+from utils.data_loader import DATASETS
+from utils.parquet_cache import CACHE_DIR
+from utils.query import cubo, linhas_cubo
+
+# --- Exportação em Lote ---
+# Todas as linhas (aeroporto x cenário x ano) de uma ou mais bases, lidas do cubo em
+# blocos de aeroportos consecutivos do índice por ICAO e gravadas em um único .zip
+# (um arquivo por base). Cada bloco é escrito e descartado antes do seguinte, e as
+# entradas do zip são gravadas em fluxo: a memória fica limitada ao tamanho do bloco,
+# e não ao da exportação. O destino pode ser um arquivo sem seek (ex.: stdout).
+
+FORMATOS = {'parquet': 'Parquet', 'csv': 'CSV', 'xlsx': 'Excel'}
+BLOCO_LINHAS = 100_000
+# Limite de linhas de uma planilha do Excel (o cabeçalho ocupa uma)
+EXCEL_MAX_LINHAS = 1_048_575
+# CSV no mesmo padrão das bases de origem (abre direto no Excel em pt-BR)
+CSV_OPCOES = {'sep': ';', 'decimal': ',', 'index': False}
+# Versão do layout exportado: incrementar quando as colunas mudarem
+EXPORTACAO_VERSAO = 1
+EXPORTACAO_DIR = os.path.join(CACHE_DIR, 'exportacao')
+
+# Uma trava por arquivo de destino: sessões do Streamlit e workers da API rodam no
+# mesmo processo, e a mesma exportação pedida em paralelo é gerada uma única vez
+_travas = {}
+_travas_guarda = threading.Lock()
+
+
+def blocos(cube, linhas_por_bloco=BLOCO_LINHAS):
+    """DataFrames (icao, aeroporto, uf, cidade, cenario, ano, valor) com até
+    linhas_por_bloco linhas (ou um aeroporto inteiro), na ordem do índice."""
+    posicoes = cube['indice']['posicoes']
+    local = cube['seletor']['local']
+    if not posicoes:
+        yield pd.DataFrame(columns=['icao', 'aeroporto', 'uf', 'cidade', 'cenario', 'ano', cube['metrica']])
+        return
+    grupo, tamanho = [], 0
+    icaos = list(posicoes)
+    for i, icao in enumerate(icaos):
+        grupo.append(icao)
+        tamanho += posicoes[icao][1] - posicoes[icao][0]
+        if tamanho < linhas_por_bloco and i < len(icaos) - 1:
+            continue
+        colunas = linhas_cubo(cube, grupo)
+        # Dados do cadastro por ICAO do bloco, expandidos pelos códigos (sem laço por linha)
+        codigos = colunas['icao'].codes
+        cadastro = np.array([local.get(icao, ('', '', '')) for icao in colunas['icao'].categories], dtype=object).reshape(-1, 3)
+        yield pd.DataFrame({
+            'icao': colunas['icao'],
+            'aeroporto': cadastro[codigos, 2],
+            'uf': cadastro[codigos, 0],
+            'cidade': cadastro[codigos, 1],
+            'cenario': colunas['cenario'],
+            'ano': colunas['ano'],
+            cube['metrica']: colunas['valor'],
+        })
+        grupo, tamanho = [], 0
+
+
+def _parquet(partes, destino):
+    escritor = None
+    try:
+        for df in partes:
+            # Categóricos como texto: o dicionário de cada bloco é diferente
+            tabela = pa.Table.from_pandas(df.astype({'icao': str, 'cenario': str}), preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(destino, tabela.schema, compression='zstd')
+            escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def _csv(partes, destino):
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    for i, df in enumerate(partes):
+        df.to_csv(texto, header=(i == 0), **CSV_OPCOES)
+    texto.flush()
+    texto.detach()
+
+
+def _xlsx(partes, destino, titulo):
+    # openpyxl só é necessário para esta exportação
+    from openpyxl import Workbook
+
+    # Modo write_only: as linhas vão para o disco conforme são adicionadas
+    livro = Workbook(write_only=True)
+    planilha, usadas, n = None, EXCEL_MAX_LINHAS, 0
+    for df in partes:
+        for linha in df.itertuples(index=False):
+            if usadas >= EXCEL_MAX_LINHAS:
+                n += 1
+                planilha = livro.create_sheet(titulo if n == 1 else f'{titulo} ({n})')
+                planilha.append(list(df.columns))
+                usadas = 0
+            planilha.append(list(linha))
+            usadas += 1
+    if planilha is None:
+        livro.create_sheet(titulo)
+    # O .xlsx também é um zip: é montado em um arquivo temporário e copiado em fluxo
+    with tempfile.TemporaryFile() as tmp:
+        livro.save(tmp)
+        tmp.seek(0)
+        shutil.copyfileobj(tmp, destino)
+
+
+def exportar(destino, bases, formato='parquet'):
+    """Grava em destino (caminho ou arquivo binário) um .zip com um arquivo por base."""
+    if formato not in FORMATOS:
+        raise ValueError(f"formato inválido: {formato} (use {', '.join(FORMATOS)})")
+    # Parquet (zstd) e xlsx já saem comprimidos: só o CSV é comprimido no zip
+    compressao = zipfile.ZIP_DEFLATED if formato == 'csv' else zipfile.ZIP_STORED
+    with zipfile.ZipFile(destino, 'w', compression=compressao) as zf:
+        for nome in bases:
+            partes = blocos(cubo(nome))
+            with zf.open(f'{nome}.{formato}', 'w', force_zip64=True) as entrada:
+                if formato == 'parquet':
+                    _parquet(partes, entrada)
+                elif formato == 'csv':
+                    _csv(partes, entrada)
+                else:
+                    # Nome de planilha: até 31 caracteres
+                    _xlsx(partes, entrada, nome[:31])
+
+
+def arquivo_exportacao(bases, formato='parquet'):
+    """Caminho do .zip exportado, gerado uma vez por versão dos cubos das bases."""
+    chave = repr(([cube_key(nome) for nome in bases], list(bases), formato, EXPORTACAO_VERSAO))
+    prefixo = 'todas' if set(bases) == {n for n, spec in DATASETS.items() if spec['metrica']} else '-'.join(bases)
+    destino = os.path.join(EXPORTACAO_DIR, f'projecoes-{prefixo}-{formato}-{hashlib.sha256(chave.encode()).hexdigest()[:12]}.zip')
+    if os.path.exists(destino):
+        return destino
+
+    with _travas_guarda:
+        trava = _travas.setdefault(destino, threading.Lock())
+    with trava:
+        # Outra thread pode ter gerado o arquivo enquanto esta esperava
+        if os.path.exists(destino):
+            return destino
+        os.makedirs(EXPORTACAO_DIR, exist_ok=True)
+        # Nome temporário único (outros processos podem gerar a mesma exportação)
+        with tempfile.NamedTemporaryFile(dir=EXPORTACAO_DIR, suffix='.tmp', delete=False) as tmp:
+            try:
+                exportar(tmp, bases, formato)
+            except BaseException:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+        os.replace(tmp.name, destino)
+        # Exportações antigas das mesmas bases/formato (outro processo pode já tê-las removido)
+        for antigo in glob.glob(os.path.join(EXPORTACAO_DIR, f'projecoes-{prefixo}-{formato}-*.zip')):
+            if antigo == destino:
+                continue
+            try:
+                os.remove(antigo)
+            except FileNotFoundError:
+                pass
+    return destino
@@ -0,0 +1,99 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Escalas abreviadas dos rótulos (valores abaixo de 1 milhão saem inteiros)
+ESCALAS = [(1e9, 'B'), (1e6, 'M')]
+# Maior potência de 1000 representável em int64
+_GRUPOS_MAX = 6
+
+
+# --- FUNÇÃO DE FORMATAÇÃO PRINCIPAL (PADRÃO BR) ---
+def fmt(v, is_carga):
+    if v is None or np.isnan(v): return "N/A"
+    v = abs(v)
+
+    if is_carga:
+        if v >= 1e9: text = f"{v/1e9:,.1f}" + "B kg"
+        elif v >= 1e6: text = f"{v/1e6:,.1f}" + "M kg"
+        else: text = f"{v:,.0f}" + " kg"
+    else:
+        if v >= 1e9: text = f"{v/1e9:,.1f}" + "B"
+        elif v >= 1e6: text = f"{v/1e6:,.1f}" + "M"
+        else: text = f"{v:,.0f}"
+
+    # Converte para padrão brasileiro (PONTO para milhar, VÍRGULA para decimal)
+    text = text.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+    return text
+
+
+def _milhares(inteiros):
+    """Inteiros não negativos -> texto com ponto como separador de milhar."""
+    texto = np.strings.zfill((inteiros % 1000).astype(str), 3)
+    for k in range(1, _GRUPOS_MAX + 1):
+        tem_grupo = inteiros >= 1000 ** k
+        if not tem_grupo.any():
+            break
+        grupo = np.strings.zfill((inteiros // 1000 ** k % 1000).astype(str), 3)
+        texto = np.where(tem_grupo, np.strings.add(np.strings.add(grupo, '.'), texto), texto)
+    texto = np.strings.lstrip(texto, '0')
+    return np.where(texto == '', '0', texto)
+
+
+def fmt_br_array(valores, is_carga, sinal=False):
+    """Versão vetorizada de fmt: um array de valores -> array de rótulos, idênticos aos de fmt.
+
+    O arredondamento é feito em inteiros (unidades, ou décimos para M/B); valores não
+    finitos ou muito próximos de um empate de arredondamento caem no fmt escalar.
+    Como fmt, usa o valor absoluto; com sinal=True os negativos recebem '-' (ex.: variações).
+    """
+    originais = np.asarray(valores, dtype=float)
+    v = np.abs(originais)
+    if v.size == 0:
+        return np.array([], dtype=str)
+
+    escala = np.select([v >= limite for limite, _ in ESCALAS], [limite for limite, _ in ESCALAS], 1.0)
+    sufixo = np.select([v >= limite for limite, _ in ESCALAS], [s for _, s in ESCALAS], '')
+    decimal = escala > 1
+    fator = np.where(decimal, 10.0, 1.0)
+
+    with np.errstate(invalid='ignore'):
+        escalado = v / escala * fator
+        # v/escala*10 pode errar o empate (.x5) que o f-string decide sobre v/escala
+        frac = escalado - np.floor(escalado)
+        duvida = ~np.isfinite(escalado) | (escalado >= 2.0 ** 62) | (np.abs(frac - 0.5) < 1e-6)
+    arredondado = np.rint(np.where(duvida, 0, escalado)).astype(np.int64)
+
+    inteiros = np.where(decimal, arredondado // 10, arredondado)
+    texto = _milhares(inteiros)
+    texto = np.where(decimal, np.strings.add(np.strings.add(texto, ','), (arredondado % 10).astype(str)), texto)
+    if is_carga:
+        sufixo = np.where(decimal, np.strings.add(sufixo, ' kg'), ' kg')
+    texto = np.strings.add(texto, sufixo).astype(object)
+
+    for i in np.flatnonzero(duvida):
+        texto[i] = fmt(float(v[i]), is_carga)
+    if sinal:
+        # Negativos que arredondam para zero ficam sem sinal
+        for i in np.flatnonzero(originais < 0):
+            if not texto[i].startswith('0'):
+                texto[i] = '-' + texto[i]
+    return texto
+
+
+def fmt_cagr(cagr):
+    """CAGR (% a.a.) no padrão BR; inf (crescimento a partir de zero) tem rótulo próprio."""
+    if cagr is None or np.isnan(cagr): return "N/A"
+    if cagr == float('inf'): return "Crescimento Ilimitado"
+    return f"{cagr:.2f}%".replace('.', ',')
+
+
+# Rótulos dos ticks do eixo Y (inteiros com ponto de milhar); poucos valores distintos
+@lru_cache(maxsize=1024)
+def fmt_dot(x):
+    try:
+        s = f"{int(round(x)):,}"
+        return s.replace(',', '.')
+    except Exception:
+        return str(x)
@@ -0,0 +1,208 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# --- Instrumentação (por execução e acumulada no processo) ---
+# Cada execução (rerun) do app abre um registro com a duração de cada seção, os
+# acertos/faltas de cache e o tamanho do que foi enviado ao navegador. Ao final o
+# registro vira uma linha de log estruturada (JSON) e é somado aos totais do
+# processo, expostos no formato texto do Prometheus (texto_prometheus / servidor).
+# O Streamlit executa cada sessão em uma thread: o registro corrente é por thread.
+
+_trava = threading.Lock()
+_local = threading.local()
+_servidor = {}
+_logs_configurados = set()
+
+# Totais do processo
+DURACOES = {}   # {secao: [soma em segundos, execuções]}
+CACHES = {}     # {(cache, 'acerto' | 'falta'): chamadas}
+TAMANHOS = {}   # {conteudo: [soma em bytes, execuções]}
+EXECUCOES = [0]
+
+
+# --- Logs ---
+def configurar_logs(*nomes):
+    """Nível (LOG_NIVEL, padrão INFO) e saída dos loggers nomes, uma vez por logger.
+
+    Sob o streamlit run ninguém configura o logging raiz, e os registros INFO do projeto
+    seriam descartados: sem handler no raiz, cada logger ganha um StreamHandler (stderr).
+    Com o raiz já configurado (ex.: basicConfig, pytest) só o nível é ajustado.
+    """
+    for nome in nomes:
+        if nome in _logs_configurados:
+            continue
+        _logs_configurados.add(nome)
+        alvo = logging.getLogger(nome)
+        alvo.setLevel(os.environ.get('LOG_NIVEL', 'INFO').upper())
+        if not logging.getLogger().handlers:
+            saida = logging.StreamHandler()
+            saida.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+            alvo.addHandler(saida)
+
+
+# --- Registro por Execução ---
+def iniciar_execucao(inicio=None):
+    """Abre o registro da execução corrente (chamado no início do script); inicio é o
+    perf_counter de referência do total (padrão: agora)."""
+    _local.execucao = {'inicio': inicio if inicio is not None else time.perf_counter(),
+                       'secoes': {}, 'cache': {}, 'bytes': {}}
+
+
+def _execucao():
+    return getattr(_local, 'execucao', None)
+
+
+@contextmanager
+def secao(nome):
+    """Mede a duração de um trecho (seções podem ser aninhadas; cada uma soma a sua)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        execucao = _execucao()
+        if execucao is not None:
+            execucao['secoes'][nome] = execucao['secoes'].get(nome, 0.0) + segundos
+
+
+def registrar_tamanho(conteudo, n_bytes):
+    """Tamanho (bytes) de um conteúdo enviado ao navegador nesta execução."""
+    execucao = _execucao()
+    if execucao is not None:
+        execucao['bytes'][conteudo] = execucao['bytes'].get(conteudo, 0) + n_bytes
+
+
+def _registrar_cache(cache, resultado):
+    with _trava:
+        CACHES[(cache, resultado)] = CACHES.get((cache, resultado), 0) + 1
+    execucao = _execucao()
+    if execucao is not None:
+        contagem = execucao['cache'].setdefault(cache, {'acerto': 0, 'falta': 0})
+        contagem[resultado] += 1
+
+
+def registrar_falta():
+    """Chamado no corpo de uma função em cache: a chamada corrente foi uma falta."""
+    _local.falta = True
+
+
+def cache_instrumentado(nome):
+    """Decorador para funções em cache (st.cache_resource, lru_cache) cujo corpo chama
+    registrar_falta(): cada chamada conta como acerto ou falta do cache nome."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            # Chamadas aninhadas (um cache que consulta outro) têm marcação própria
+            anterior = getattr(_local, 'falta', False)
+            _local.falta = False
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                _registrar_cache(nome, 'falta' if _local.falta else 'acerto')
+                _local.falta = anterior
+        return envolvida
+    return decorador
+
+
+def finalizar_execucao():
+    """Fecha o registro da execução: soma aos totais, grava a linha de log e o devolve
+    (durações em ms), ou None se nenhuma execução foi aberta nesta thread."""
+    execucao = _execucao()
+    if execucao is None:
+        return None
+    _local.execucao = None
+    execucao['secoes']['total'] = time.perf_counter() - execucao['inicio']
+
+    with _trava:
+        EXECUCOES[0] += 1
+        for nome, segundos in execucao['secoes'].items():
+            soma = DURACOES.setdefault(nome, [0.0, 0])
+            soma[0] += segundos
+            soma[1] += 1
+        for conteudo, n_bytes in execucao['bytes'].items():
+            soma = TAMANHOS.setdefault(conteudo, [0, 0])
+            soma[0] += n_bytes
+            soma[1] += 1
+
+    registro = {
+        'secoes_ms': {nome: round(segundos * 1000, 1) for nome, segundos in execucao['secoes'].items()},
+        'cache': execucao['cache'],
+        'bytes': execucao['bytes'],
+    }
+    logger.info('execucao %s', json.dumps(registro, ensure_ascii=False))
+    return registro
+
+
+# --- Formato Prometheus ---
+def _rotulos(**rotulos):
+    return '{' + ','.join(f'{chave}="{valor}"' for chave, valor in rotulos.items()) + '}'
+
+
+def texto_prometheus():
+    """Totais do processo no formato texto de exposição do Prometheus."""
+    with _trava:
+        linhas = [
+            '# HELP projecao_execucoes_total Execucoes (reruns) do app.',
+            '# TYPE projecao_execucoes_total counter',
+            f'projecao_execucoes_total {EXECUCOES[0]}',
+            '# HELP projecao_secao_segundos Duracao das secoes do app por execucao.',
+            '# TYPE projecao_secao_segundos summary',
+        ]
+        for nome, (soma, contagem) in sorted(DURACOES.items()):
+            linhas.append(f'projecao_secao_segundos_sum{_rotulos(secao=nome)} {soma:.6f}')
+            linhas.append(f'projecao_secao_segundos_count{_rotulos(secao=nome)} {contagem}')
+        linhas += [
+            '# HELP projecao_cache_total Chamadas das funcoes em cache, por resultado.',
+            '# TYPE projecao_cache_total counter',
+        ]
+        for (cache, resultado), chamadas in sorted(CACHES.items()):
+            linhas.append(f'projecao_cache_total{_rotulos(cache=cache, resultado=resultado)} {chamadas}')
+        linhas += [
+            '# HELP projecao_payload_bytes Tamanho do conteudo enviado ao navegador.',
+            '# TYPE projecao_payload_bytes summary',
+        ]
+        for conteudo, (soma, contagem) in sorted(TAMANHOS.items()):
+            linhas.append(f'projecao_payload_bytes_sum{_rotulos(conteudo=conteudo)} {soma}')
+            linhas.append(f'projecao_payload_bytes_count{_rotulos(conteudo=conteudo)} {contagem}')
+    return '\n'.join(linhas) + '\n'
+
+
+class _Metricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = texto_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor(porta, host='127.0.0.1'):
+    """Serve GET /metrics em uma thread (uma tentativa por processo). Se a porta não
+    estiver disponível (ex.: outro processo do app), registra o erro e segue sem o endpoint."""
+    with _trava:
+        if _servidor:
+            return
+        try:
+            servidor = ThreadingHTTPServer((host, porta), _Metricas)
+        except OSError as e:
+            _servidor['erro'] = e
+            logger.warning('Endpoint de métricas desativado: não foi possível usar %s:%d (%s)', host, porta, e)
+            return
+        _servidor['servidor'] = servidor
+    threading.Thread(target=servidor.serve_forever, name='metricas', daemon=True).start()
+    logger.info('Métricas em http://%s:%d/metrics', host, porta)
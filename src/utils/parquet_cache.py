@@ -0,0 +1,93 @@
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+# Diretório dos arquivos colunares gerados a partir dos CSVs (não versionado)
+CACHE_DIR = os.path.join('src', 'data', 'cache')
+
+
+# Hash já calculado por arquivo neste processo, válido enquanto mtime/tamanho não mudam
+_hashes = {}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Calcula o SHA-256 do arquivo de origem, lendo em blocos (uma vez por versão do arquivo)."""
+    st = os.stat(path)
+    assinatura = (st.st_mtime_ns, st.st_size)
+    if path in _hashes and _hashes[path][0] == assinatura:
+        return _hashes[path][1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloco in iter(lambda: f.read(chunk_size), b''):
+            digest.update(bloco)
+    _hashes[path] = (assinatura, digest.hexdigest())
+    return _hashes[path][1]
+
+
+def cache_key(source_path, versao=''):
+    """Chave do cache: hash do CSV combinado com a versão da declaração da base."""
+    return hashlib.sha256(f'{file_hash(source_path)}:{versao}'.encode()).hexdigest()
+
+
+def cache_path(nome, digest):
+    """Caminho do Parquet correspondente a uma versão (hash) da base."""
+    return os.path.join(CACHE_DIR, f'{nome}-{digest[:16]}.parquet')
+
+
+def _remove_stale(nome, keep):
+    # Remove versões antigas da mesma base (mesma extensão do arquivo mantido) para o
+    # diretório não crescer indefinidamente
+    extensao = os.path.splitext(keep)[1]
+    for antigo in glob.glob(os.path.join(CACHE_DIR, f'{nome}-*{extensao}')):
+        if os.path.abspath(antigo) != os.path.abspath(keep):
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def write_cache(df, target):
+    """Grava o Parquet de forma atômica (arquivo temporário + rename).
+
+    Um índice com nome (ex.: ICAO da tabela de aeroportos) é gravado e restaurado na
+    leitura; o RangeIndex das bases de projeção vai só como metadado.
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    df.to_parquet(tmp)
+    os.replace(tmp, target)
+
+
+def read_cached(nome, source_path, parser, versao=''):
+    """Lê a versão colunar da base; só faz o parse quando o CSV de origem mudou."""
+    target = cache_path(nome, cache_key(source_path, versao))
+    if os.path.exists(target):
+        try:
+            return pd.read_parquet(target)
+        except Exception:
+            # Cache corrompido ou incompatível: refaz a partir do CSV
+            pass
+
+    df = parser(source_path)
+    try:
+        write_cache(df, target)
+        _remove_stale(nome, target)
+    except Exception:
+        # Sem permissão de escrita (ex.: container read-only) o app segue com o CSV
+        pass
+    return df
+
+
+def build_all(entradas):
+    """Gera (ou confirma) o cache de cada (nome, csv, parser, versao). Retorna {nome: (parquet, reconstruido)}."""
+    resultado = {}
+    for nome, source_path, parser, versao in entradas:
+        target = cache_path(nome, cache_key(source_path, versao))
+        rebuilt = not os.path.exists(target)
+        if rebuilt:
+            write_cache(parser(source_path), target)
+            _remove_stale(nome, target)
+        resultado[nome] = (target, rebuilt)
+    return resultado
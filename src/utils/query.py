@@ -0,0 +1,182 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils import aggregates
+from utils.aggregates import ANO_ALVO, build_cube
+from utils.cube_cache import read_cube
+from utils.data_loader import DATASETS, congelar_array, load_dataset
+
+# --- Camada de Consulta (sem Streamlit) ---
+# Toda a seleção de dados do dashboard: escolha da base, série do Total Brasil ou de
+# um aeroporto, valores por ICAO de um cenário/ano (mapa), resumo por cenário
+# (cartões) e linhas filtradas (API e exportação). As funções por nome de base são
+# memoizadas no processo e devolvem arrays NumPy somente leitura e dicts simples,
+# então o app, as páginas, a exportação e a API consultam o mesmo cubo sem refazer
+# nada a cada chamada.
+# As versões *_cubo recebem o cubo diretamente (ex.: benchmark com bases sintéticas).
+
+CONSULTAS_CACHE_MAX = 512
+
+
+# --- Seleção da Base ---
+def escolher_base(tipo_projecao, natureza_pax=None, tipo_rede=None, natureza_carga=None):
+    """Nome da base do registro (DATASETS) para as opções escolhidas na sidebar."""
+    if tipo_projecao == 'Carga':
+        return 'carga_internacional' if natureza_carga == 'Internacional' else 'carga'
+    if tipo_projecao == 'Movimentação de Aeronaves':
+        return 'mov_aeronaves_pan_domestico'
+    if natureza_pax == 'Internacional':
+        return 'pax_internacional'
+    if tipo_rede == 'Mercado (Rede Atual)':
+        return 'pax_mercado'
+    return 'pax_pan_domestico'  # Doméstico e PAN
+
+
+# --- Bases e Cubos (um objeto por processo) ---
+@lru_cache(maxsize=None)
+def base(nome):
+    """Base do registro já limpa (somente leitura), lida do cache colunar."""
+    return load_dataset(nome)
+
+
+@lru_cache(maxsize=None)
+def cubo(nome):
+    """Cubo pré-agregado da base (ver aggregates.build_cube), mapeado do artefato em disco."""
+    return read_cube(nome, lambda: build_cube(base(nome), DATASETS[nome]['metrica'], base('aeroportos')))
+
+
+# --- Consultas sobre um Cubo ---
+def serie_cubo(cube, icao=None):
+    """Série do Total Brasil (icao=None) ou de um aeroporto como {cenario: (anos, valores)},
+    arrays ordenados por ano. Vazio se a base ou o ICAO não tiverem dados."""
+    df = aggregates.serie(cube, icao)
+    if df.empty:
+        return {}
+    cenarios = df['cenario'].astype(str).to_numpy()
+    anos = df['ano'].to_numpy()
+    valores = df[cube['metrica']].to_numpy(dtype=float)
+    pontos = {}
+    for cenario in dict.fromkeys(cenarios):
+        linhas = np.flatnonzero(cenarios == cenario)
+        linhas = linhas[np.argsort(anos[linhas], kind='stable')]
+        pontos[cenario] = (congelar_array(anos[linhas]), congelar_array(valores[linhas]))
+    return pontos
+
+
+def snapshot_cubo(cube, cenario, ano=ANO_ALVO):
+    """Valores por ICAO de um cenário no ano (ou no maior ano disponível):
+    {'ano': ano usado (None se o cenário não existir), 'icao': array, 'valor': array}."""
+    ano_usado, valores = aggregates.snapshot(cube, cenario, ano)
+    return {
+        'ano': ano_usado,
+        'icao': congelar_array(valores.index.to_numpy(dtype=object)),
+        'valor': congelar_array(valores.to_numpy(dtype=float)),
+    }
+
+
+def resumo_cubo(cube, icao=None):
+    """Resumo por cenário do Total Brasil (icao=None) ou de um aeroporto:
+    {cenario: {'valor_base', 'valor_final', 'cagr', 'crescimento', 'ano_pico'}}."""
+    tabela = aggregates.resumo(cube, icao)
+    return {str(cenario): linha for cenario, linha in tabela.to_dict('index').items()}
+
+
+def _cenarios_pedidos(cube, cenarios):
+    # Nomes como estão na base (sem diferenciar maiúsculas); None = todos
+    if cenarios is None:
+        return None
+    return [nome for nome in (aggregates.resolve_cenario(cube, c) for c in cenarios) if nome is not None]
+
+
+def linhas_cubo(cube, icaos=None, cenarios=None, ano_inicio=None, ano_fim=None):
+    """Linhas (icao, cenario, ano, valor) por aeroporto como arrays paralelos, filtradas
+    por ICAOs, cenários e intervalo de anos (None = sem filtro).
+
+    Sai direto dos arrays do índice por ICAO (máscaras e fatias, sem um DataFrame por
+    aeroporto); icao e cenario vêm como Categorical.
+    """
+    indice = cube['indice']
+    posicoes = indice['posicoes']
+    if icaos is None:
+        nomes = list(posicoes)
+        linhas = np.arange(len(indice['ano']))
+    else:
+        nomes = [icao for icao in dict.fromkeys(icaos) if icao in posicoes]
+        trechos = [np.arange(*posicoes[icao]) for icao in nomes]
+        linhas = np.concatenate(trechos) if trechos else np.array([], dtype=np.int64)
+    tamanhos = [posicoes[icao][1] - posicoes[icao][0] for icao in nomes]
+    codigos_icao = np.repeat(np.arange(len(nomes)), tamanhos)
+
+    mascara = np.ones(len(linhas), dtype=bool)
+    anos = indice['ano'][linhas]
+    if ano_inicio is not None:
+        mascara &= anos >= ano_inicio
+    if ano_fim is not None:
+        mascara &= anos <= ano_fim
+    pedidos = _cenarios_pedidos(cube, cenarios)
+    if pedidos is not None and len(linhas):
+        codigos = indice['cenario'].categories.get_indexer(pedidos)
+        mascara &= np.isin(indice['cenario'].codes[linhas], codigos)
+
+    linhas = linhas[mascara]
+    return {
+        'icao': pd.Categorical.from_codes(codigos_icao[mascara], categories=pd.Index(nomes, dtype=object)),
+        'cenario': indice['cenario'][linhas],
+        'ano': congelar_array(indice['ano'][linhas]),
+        'valor': congelar_array(indice['valor'][linhas]),
+    }
+
+
+def total_cubo(cube, cenarios=None, ano_inicio=None, ano_fim=None):
+    """Linhas (cenario, ano, valor) do Total Brasil como arrays paralelos, com os
+    mesmos filtros de linhas_cubo."""
+    total = cube['total']
+    if total.empty:
+        return {'cenario': pd.Categorical([]), 'ano': np.array([], dtype=np.int64), 'valor': np.array([])}
+    mascara = np.ones(len(total), dtype=bool)
+    anos = total['ano'].to_numpy()
+    if ano_inicio is not None:
+        mascara &= anos >= ano_inicio
+    if ano_fim is not None:
+        mascara &= anos <= ano_fim
+    pedidos = _cenarios_pedidos(cube, cenarios)
+    if pedidos is not None:
+        mascara &= total['cenario'].isin(pedidos).to_numpy()
+    return {
+        'cenario': total['cenario'].array[mascara],
+        'ano': congelar_array(anos[mascara]),
+        'valor': congelar_array(total[cube['metrica']].to_numpy()[mascara]),
+    }
+
+
+# --- Consultas por Base (memoizadas) ---
+@lru_cache(maxsize=CONSULTAS_CACHE_MAX)
+def serie(nome, icao=None):
+    """serie_cubo da base (resultado compartilhado: não alterar)."""
+    return serie_cubo(cubo(nome), icao)
+
+
+@lru_cache(maxsize=CONSULTAS_CACHE_MAX)
+def snapshot(nome, cenario, ano=ANO_ALVO):
+    """snapshot_cubo da base (resultado compartilhado: não alterar)."""
+    return snapshot_cubo(cubo(nome), cenario, ano)
+
+
+@lru_cache(maxsize=CONSULTAS_CACHE_MAX)
+def resumo(nome, icao=None):
+    """resumo_cubo da base (resultado compartilhado: não alterar)."""
+    return resumo_cubo(cubo(nome), icao)
+
+
+@lru_cache(maxsize=CONSULTAS_CACHE_MAX)
+def linhas(nome, icaos=None, cenarios=None, ano_inicio=None, ano_fim=None):
+    """linhas_cubo da base; icaos e cenarios como tuplas (resultado compartilhado: não alterar)."""
+    return linhas_cubo(cubo(nome), icaos, cenarios, ano_inicio, ano_fim)
+
+
+@lru_cache(maxsize=CONSULTAS_CACHE_MAX)
+def total(nome, cenarios=None, ano_inicio=None, ano_fim=None):
+    """total_cubo da base; cenarios como tupla (resultado compartilhado: não alterar)."""
+    return total_cubo(cubo(nome), cenarios, ano_inicio, ano_fim)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Os módulos do app são importados como no streamlit run (a partir de src/), e os
+# caminhos das bases são relativos à raiz do repositório
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+os.chdir(RAIZ)
+
+
+@pytest.fixture
+def cache_temporario(tmp_path, monkeypatch):
+    """Cache de dados (Parquet, cubos, dialetos) em tmp_path: os testes não gravam em src/data/cache."""
+    from utils import csv_sniffer, cube_cache, parquet_cache
+
+    monkeypatch.setattr(parquet_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cube_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(csv_sniffer, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(csv_sniffer, 'DIALETOS_PATH', str(tmp_path / 'dialetos.json'))
+    return tmp_path
@@ -0,0 +1,113 @@
+import asyncio
+import gzip
+import json
+from urllib.parse import urlencode
+
+import pyarrow as pa
+import pytest
+
+import api
+from utils import query
+
+BASE = 'carga_internacional'
+
+
+def _limpar_caches():
+    for funcao in (query.base, query.cubo, api.versao, api.corpo):
+        funcao.cache_clear()
+
+
+@pytest.fixture
+def cliente(cache_temporario):
+    """GET na aplicação ASGI (sem servidor), com bases e cubos montados em tmp_path."""
+    _limpar_caches()
+
+    def get(caminho, params=None, **cabecalhos):
+        escopo = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'server': ('teste', 80), 'client': ('127.0.0.1', 1234), 'root_path': '',
+            'path': caminho, 'raw_path': caminho.encode(),
+            'query_string': urlencode(params or {}, doseq=True).encode(),
+            'headers': [(chave.replace('_', '-').encode(), valor.encode()) for chave, valor in cabecalhos.items()],
+        }
+        resposta = {'corpo': b''}
+
+        async def receber():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def enviar(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                resposta['status'] = mensagem['status']
+                resposta['cabecalhos'] = {k.decode(): v.decode() for k, v in mensagem['headers']}
+            elif mensagem['type'] == 'http.response.body':
+                resposta['corpo'] += mensagem.get('body', b'')
+
+        asyncio.run(api.app(escopo, receber, enviar))
+        return resposta
+
+    yield get
+    _limpar_caches()
+
+
+def test_etag_e_304(cliente):
+    caminho = f'/bases/{BASE}/total'
+    primeira = cliente(caminho)
+    assert primeira['status'] == 200
+    etag = primeira['cabecalhos']['etag']
+    assert etag.startswith('W/"')
+    assert json.loads(primeira['corpo'])['base'] == BASE
+
+    # Comparação fraca, em lista ou com *
+    for if_none_match in (etag, etag[2:], f'"outra", {etag}', '*'):
+        revalidacao = cliente(caminho, if_none_match=if_none_match)
+        assert revalidacao['status'] == 304, if_none_match
+        assert revalidacao['corpo'] == b''
+        assert revalidacao['cabecalhos']['etag'] == etag
+
+    assert cliente(caminho, if_none_match='"outra", W/"mais-uma"')['status'] == 200
+    # Outros filtros, outra ETag
+    assert cliente(caminho, {'ano_inicio': 2030}, if_none_match=etag)['status'] == 200
+
+
+def test_gzip_negociado(cliente):
+    caminho = f'/bases/{BASE}/projecoes'
+    simples = cliente(caminho)
+    assert len(simples['corpo']) >= api.GZIP_MINIMO_BYTES
+    assert 'content-encoding' not in simples['cabecalhos']
+
+    comprimida = cliente(caminho, accept_encoding='br, gzip')
+    assert comprimida['status'] == 200
+    assert comprimida['cabecalhos']['content-encoding'] == 'gzip'
+    assert comprimida['cabecalhos']['etag'] == simples['cabecalhos']['etag']
+    assert gzip.decompress(comprimida['corpo']) == simples['corpo']
+
+
+def test_arrow(cliente):
+    caminho = f'/bases/{BASE}/projecoes'
+    como_json = json.loads(cliente(caminho, {'cenario': 'Tendencial'})['corpo'])
+    por_accept = cliente(caminho, {'cenario': 'Tendencial'}, accept=api.TIPO_ARROW)
+    por_parametro = cliente(caminho, {'cenario': 'Tendencial', 'formato': 'arrow'})
+    assert por_accept['cabecalhos']['content-type'] == api.TIPO_ARROW
+    assert por_accept['corpo'] == por_parametro['corpo']
+
+    tabela = pa.ipc.open_stream(por_accept['corpo']).read_all()
+    assert tabela.schema.metadata[b'metrica'].decode() == como_json['metrica']
+    assert tabela.num_rows == como_json['linhas'] > 0
+    assert tabela.column('ano').to_pylist() == como_json['ano']
+
+
+@pytest.mark.parametrize('caminho, params', [
+    (f'/bases/{BASE}/projecoes', {'ano_inicio': 'dois mil'}),
+    (f'/bases/{BASE}/projecoes', {'formato': 'xml'}),
+    (f'/bases/{BASE}/resumo', {'icao': 'SBGR,SBKP'}),
+])
+def test_parametros_invalidos(cliente, caminho, params):
+    resposta = cliente(caminho, params)
+    assert resposta['status'] == 400
+    assert 'erro' in json.loads(resposta['corpo'])
+
+
+def test_base_inexistente(cliente):
+    resposta = cliente('/bases/nao_existe/total')
+    assert resposta['status'] == 404
+    assert 'nao_existe' in json.loads(resposta['corpo'])['erro']
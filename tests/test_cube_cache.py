@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregates import build_cube
+from utils.cube_cache import map_cube, write_cube
+from utils.data_loader import DATASETS, parse_dataset
+
+
+def _iguais(a, b):
+    assert type(a) is type(b)
+    if isinstance(a, dict):
+        assert list(a) == list(b)
+        for chave in a:
+            _iguais(a[chave], b[chave])
+    elif isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(a, b, check_exact=True)
+    elif isinstance(a, pd.Series):
+        pd.testing.assert_series_equal(a, b, check_exact=True)
+    elif isinstance(a, pd.Categorical):
+        pd.testing.assert_extension_array_equal(a, b)
+    elif isinstance(a, np.ndarray):
+        assert a.dtype == b.dtype
+        np.testing.assert_array_equal(a, b)
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _iguais(x, y)
+    else:
+        assert a == b
+
+
+def test_cubo_ida_e_volta(cache_temporario):
+    nome = 'carga_internacional'
+    cube = build_cube(parse_dataset(nome), DATASETS[nome]['metrica'], parse_dataset('aeroportos'))
+    destino = cache_temporario / 'cubo.mmap'
+    write_cube(cube, str(destino))
+    mapeado = map_cube(str(destino))
+
+    _iguais(cube, mapeado)
+    # Arrays do cubo são views somente leitura do mapeamento
+    assert not mapeado['indice']['valor'].flags.writeable
+
+
+def test_cubo_recusa_objetos_arbitrarios(tmp_path):
+    with pytest.raises(TypeError):
+        write_cube({'x': object()}, str(tmp_path / 'cubo.mmap'))
@@ -0,0 +1,18 @@
+import logging
+
+from components import data
+
+
+def test_registrar_inicializacao_grava_relatorio(caplog, monkeypatch):
+    monkeypatch.setattr(data, '_inicializacao', {})
+    monkeypatch.setattr(data, 'TEMPOS_CARGA', {('cubo', 'carga'): 0.0123})
+    with caplog.at_level(logging.INFO, logger='components.data'):
+        data.registrar_inicializacao(0.5)
+        data.registrar_inicializacao(0.9)
+
+    linhas = [r.getMessage() for r in caplog.records if r.name == 'components.data']
+    assert linhas == ['Primeira execução em 500 ms; carregado: cubo carga: 12.3 ms']
+
+
+def test_logger_de_inicializacao_em_info():
+    assert logging.getLogger('components.data').isEnabledFor(logging.INFO)
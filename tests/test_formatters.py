@@ -0,0 +1,18 @@
+import numpy as np
+
+from utils.formatters import fmt, fmt_br_array
+
+
+def test_fmt_br_array_igual_ao_fmt():
+    valores = np.array([0, 999.4, 1234.5, 21870, 1_250_000, 3.46e9, np.nan])
+    for is_carga in (False, True):
+        assert fmt_br_array(valores, is_carga).tolist() == [fmt(v, is_carga) for v in valores]
+
+
+def test_fmt_br_array_sinal_negativo():
+    # Variação negativa (ex.: pax_mercado Pessimista SBHT) não pode sair como crescimento
+    valores = np.array([-21870.0, 21870.0, -2_500_000.0, -0.2])
+    assert fmt_br_array(valores, False, sinal=True).tolist() == ['-21.870', '21.870', '-2,5M', '0']
+    assert fmt_br_array(valores, True, sinal=True).tolist() == ['-21.870 kg', '21.870 kg', '-2,5M kg', '0 kg']
+    # Sem sinal=True o comportamento de fmt (valor absoluto) é mantido
+    assert fmt_br_array(valores, False).tolist()[0] == '21.870'
@@ -0,0 +1,35 @@
+import json
+import logging
+
+from utils.metrics import cache_instrumentado, finalizar_execucao, iniciar_execucao, registrar_falta, secao
+
+
+def test_finalizar_execucao_grava_linha_de_log(caplog):
+    @cache_instrumentado('teste')
+    def carregar(falta):
+        if falta:
+            registrar_falta()
+
+    iniciar_execucao()
+    with secao('grafico'):
+        carregar(True)
+        carregar(False)
+    with caplog.at_level(logging.INFO, logger='utils.metrics'):
+        registro = finalizar_execucao()
+
+    linhas = [r for r in caplog.records if r.name == 'utils.metrics' and r.getMessage().startswith('execucao ')]
+    assert len(linhas) == 1
+    assert json.loads(linhas[0].getMessage()[len('execucao '):]) == registro
+    assert registro['cache'] == {'teste': {'acerto': 1, 'falta': 1}}
+    assert set(registro['secoes_ms']) == {'grafico', 'total'}
+
+
+def test_configurar_logs_usa_nivel_info(monkeypatch):
+    from utils import metrics
+
+    monkeypatch.setattr(metrics, '_logs_configurados', set())
+    monkeypatch.delenv('LOG_NIVEL', raising=False)
+    logger = logging.getLogger('utils.metrics')
+    monkeypatch.setattr(logger, 'level', logging.NOTSET)
+    metrics.configurar_logs('utils.metrics')
+    assert logger.isEnabledFor(logging.INFO)